@@ -0,0 +1,174 @@
+"""
+難易度・バランス調整用のバッチシミュレータ
+パラメータの組とシードの全組み合わせについて，描画なしのゲームを全コアで並列に実行し，
+生存フレーム数・スコア・画面上の弾数・1ステップの処理時間をパラメータの組ごとに集計して表示する
+プレイヤーは常にビームを撃ちながら左右に往復するだけの簡単な操作で代用する
+この操作ではボスの出現（tmr 400）前後で倒されるので，ボスのパラメータを調べるときは
+--invincible でこうかとんを無敵にし，ゲームオーバーの代わりに被弾回数（hits）で比べる
+
+実行方法：
+    python benchmarks/batch.py --seeds 16
+    python benchmarks/batch.py --seeds 16 --set enemy_hp=3,6 --set bullet_speed=1.0,1.3
+    python benchmarks/batch.py --set boss_odds=25/50/75/100,10/20/30/100 --csv result.csv
+    python benchmarks/batch.py --invincible --set boss_hp=50,500
+"""
+import argparse
+import csv
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pygame as pg
+
+import main as game
+
+# 調整できるパラメータ：名前 → （文字列からの変換，既定値）
+TUNABLES = {
+    "enemy_hp": (int, game.Enemy.base_hp),  # 通常敵の体力（＋レベル）
+    "boss_hp": (int, game.BossEnemy.base_hp),  # ボスの体力（＋レベル×boss_hp_per_level）
+    "boss_hp_per_level": (int, game.BossEnemy.hp_per_level),
+    "bullet_speed": (float, game.EnemyAttack.speed_scale),  # 敵弾の速さの倍率
+    "boss_odds": (lambda v: [int(x) for x in v.split("/")], None),  # ボスの各パターンの出目の上限
+}
+
+_screen = None
+
+
+def init_worker():
+    """
+    ワーカープロセスごとに一度だけ画面（ダミー）と画像を用意する
+    """
+    global _screen
+    pg.init()
+    root = pg.display.set_mode((game.WIDTH, game.HEIGHT))
+    _screen = root.subsurface((0, 0, game.GAME_WIDTH, game.HEIGHT))
+    game.Assets.load_all()
+    game.BeamAtlas.build(15)
+    game.Bird.build_bank()
+    game.Enemy.build_cache()
+    game.BossEnemy.build_cache()
+
+
+def apply_params(params: dict):
+    """
+    パラメータをクラス変数に設定する（ワーカーは使い回されるので，指定がないものは既定値に戻す）
+    """
+    get = lambda name: params.get(name, TUNABLES[name][1])
+    game.Enemy.base_hp = get("enemy_hp")
+    game.BossEnemy.base_hp = get("boss_hp")
+    game.BossEnemy.hp_per_level = get("boss_hp_per_level")
+    game.EnemyAttack.speed_scale = get("bullet_speed")
+
+
+def simulate(seed: int, params: dict, max_frames: int, invincible: bool = False) -> dict:
+    """
+    1ゲームをヘッドレスで実行して結果を返す
+    invincible：こうかとんを常に無敵にする（被弾はhitsに数えるだけでゲームオーバーにならない）
+    """
+    apply_params(params)
+    world = game.World(_screen, random.Random(seed))
+    if params.get("boss_odds"):
+        world.boss_script = game.BOSS_SCRIPT.reweighted(params["boss_odds"])
+    left, right = game.KeyState({pg.K_SPACE, pg.K_LEFT}), game.KeyState({pg.K_SPACE, pg.K_RIGHT})
+    costs = np.empty(max_frames)
+    bullets = np.empty(max_frames, dtype=np.int32)
+    n = 0
+    while n < max_frames and not world.game_over:
+        if invincible:
+            world.bird.invincible = True
+        t = time.perf_counter()
+        world.step(left if (n // 40) % 2 else right, [])
+        costs[n] = time.perf_counter() - t
+        bullets[n] = world.bombs.n
+        n += 1
+    ms = costs[:n] * 1000
+    return {
+        "seed": seed,
+        "frames": world.tmr,
+        "survived": not world.game_over,
+        "score": world.score,
+        "hits": world.hits,
+        "bullets_mean": float(bullets[:n].mean()),
+        "bullets_max": int(bullets[:n].max()),
+        "step_ms": float(ms.mean()),
+        "step_p99_ms": float(np.percentile(ms, 99)),
+        "cpu_s": float(costs[:n].sum()),
+    }
+
+
+def run(param_sets: list[dict], seeds: list[int], max_frames: int, workers: int | None = None, invincible: bool = False):
+    """
+    全てのパラメータの組とシードの組み合わせを並列に実行し，（パラメータの組, 結果）のリストを返す
+    """
+    jobs = [(params, seed) for params in param_sets for seed in seeds]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = [pool.submit(simulate, seed, params, max_frames, invincible) for params, seed in jobs]
+        return [(params, future.result()) for (params, _), future in zip(jobs, futures)]
+
+
+def label(params: dict) -> str:
+    if not params:
+        return "default"
+    return " ".join(f"{k}={'/'.join(map(str, v)) if isinstance(v, list) else v}" for k, v in params.items())
+
+
+def parse_sets(specs: list[str]) -> list[dict]:
+    """
+    ["enemy_hp=3,6", "bullet_speed=1.0,1.3"] のような指定から，全ての組み合わせを作る
+    """
+    axes = []
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in TUNABLES:
+            raise SystemExit(f"unknown parameter: {name} (choose from {', '.join(TUNABLES)})")
+        conv = TUNABLES[name][0]
+        axes.append([(name, conv(v)) for v in values.split(",")])
+    return [dict(combo) for combo in itertools.product(*axes)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seeds", type=int, default=8, help="パラメータの組ごとに実行するシードの数")
+    parser.add_argument("--frames", type=int, default=3000, help="1ゲームの最大フレーム数")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=V1,V2",
+                        help=f"調整するパラメータと値の候補（{', '.join(TUNABLES)}）")
+    parser.add_argument("--invincible", action="store_true", help="こうかとんを無敵にして最大フレーム数まで続ける（ボスの調整用）")
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数（既定は全コア）")
+    parser.add_argument("--csv", default=None, help="ゲームごとの結果を書き出すCSVファイル名")
+    args = parser.parse_args()
+
+    param_sets = parse_sets(args.set)
+    seeds = list(range(args.seeds))
+    workers = args.workers or os.cpu_count()
+    start = time.perf_counter()
+    results = run(param_sets, seeds, args.frames, workers, args.invincible)
+    wall = time.perf_counter() - start
+
+    print(f"{'params':40s}{'games':>6s}{'alive':>6s}{'frames':>8s}{'score':>8s}{'hits':>7s}{'bullets':>9s}{'max':>6s}{'ms/step':>9s}{'p99':>7s}")
+    for params in param_sets:
+        rows = [r for p, r in results if p is params]
+        col = lambda key: np.mean([r[key] for r in rows])
+        print(f"{label(params):40s}{len(rows):6d}{sum(r['survived'] for r in rows):6d}{col('frames'):8.0f}{col('score'):8.1f}{col('hits'):7.1f}"
+              f"{col('bullets_mean'):9.1f}{max(r['bullets_max'] for r in rows):6d}{col('step_ms'):9.3f}{col('step_p99_ms'):7.2f}")
+    cpu = sum(r["cpu_s"] for _, r in results)
+    print(f"{len(results)} games in {wall:.2f}s on {workers} workers (simulation {cpu:.2f}s, x{cpu / wall:.1f} parallel)")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["params"] + list(results[0][1]))
+            for params, r in results:
+                writer.writerow([label(params)] + list(r.values()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+当たり判定のブロードフェーズ比較ベンチマーク
+pygame標準の groupcollide / spritecollide と SpatialHash を
+弾数 100 / 1,000 / 10,000 で比較する
+ビーム対敵機の計測値にはビームの移動（beam movement）の時間が含まれる
+
+実行方法：python benchmarks/bench_collision.py
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame as pg
+
+import main as game
+
+REPEAT = 50
+NUM_ENEMIES = 30
+NUM_SHIELDS = 1
+
+
+def timeit(func) -> float:
+    """
+    funcをREPEAT回実行し，1回あたりの平均時間（ミリ秒）を返す
+    """
+    func()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def make_sprite(x: int, y: int, w: int, h: int) -> pg.sprite.Sprite:
+    spr = pg.sprite.Sprite()
+    spr.rect = pg.Rect(0, 0, w, h)
+    spr.rect.center = x, y
+    return spr
+
+
+def bench(n: int, rng: random.Random) -> dict[str, float]:
+    # ビーム対敵機：敵機はNUM_ENEMIES体，ビームはn本
+    emys = pg.sprite.Group(make_sprite(rng.randrange(game.GAME_WIDTH), rng.randrange(game.HEIGHT//2), 64, 57) for _ in range(NUM_ENEMIES))
+    beams = pg.sprite.Group(make_sprite(rng.randrange(game.GAME_WIDTH), rng.randrange(game.HEIGHT), 20, 64) for _ in range(n))
+    grid = game.SpatialHash()
+    grid.sync(beams)
+
+    def move_beams():
+        for beam in beams:
+            beam.rect.y = (beam.rect.y - 10) % game.HEIGHT
+
+    def beam_pygame():
+        move_beams()
+        pg.sprite.groupcollide(emys, beams, False, False)
+
+    def beam_grid():
+        move_beams()
+        grid.sync(beams)
+        grid.collide_group(emys, False)
+
+    # 爆弾対こうかとん・爆弾対シールド：爆弾はn個
+    bird = make_sprite(game.GAME_WIDTH//2, game.HEIGHT - 100, 43, 43)
+    shields = pg.sprite.Group(make_sprite(game.GAME_WIDTH//2, game.HEIGHT - 160, 20, 86) for _ in range(NUM_SHIELDS))
+    bomb_sprites = pg.sprite.Group(make_sprite(rng.randrange(game.GAME_WIDTH), rng.randrange(game.HEIGHT), 20, 20) for _ in range(n))
+    field = game.BulletField()
+    origin = pg.Rect(0, 0, 0, 0)
+    for spr in bomb_sprites:
+        origin.center = spr.rect.center
+        field.emit(origin, 10, 0, [0])
+
+    def bomb_pygame():
+        pg.sprite.spritecollide(bird, bomb_sprites, False)
+        pg.sprite.groupcollide(bomb_sprites, shields, False, False)
+
+    def bomb_grid():
+        field.indexed = False  # 毎フレーム弾が動く想定で添字表を作り直す
+        field.collide_rect(bird.rect)
+        for shd in shields:
+            field.collide_rect(shd.rect)
+
+    return {
+        "beam movement (common)": timeit(move_beams),
+        "beam/enemy pygame": timeit(beam_pygame),
+        "beam/enemy grid": timeit(beam_grid),
+        "bomb/bird+shield pygame": timeit(bomb_pygame),
+        "bomb/bird+shield grid": timeit(bomb_grid),
+    }
+
+
+def main():
+    pg.init()
+    pg.display.set_mode((game.WIDTH, game.HEIGHT))
+    game.Assets.load_all()
+    rng = random.Random(0)
+    for n in (100, 1000, 10000):
+        print(f"--- {n} projectiles ---")
+        for name, ms in bench(n, rng).items():
+            print(f"{name:26s} {ms:8.3f} ms/frame")
+    pg.quit()
+
+
+if __name__ == "__main__":
+    main()
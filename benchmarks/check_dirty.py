@@ -0,0 +1,67 @@
+"""
+差分描画（DirtyRenderer）の回帰チェック
+同じゲームの状態を，差分描画と毎フレームの全体描画の2つのSurfaceに描き，画素単位で一致することを確かめる
+どちらのSurfaceも黒で始めるので，最初のフレームを全体描画し忘れると検出できる
+画像は別スレッドで読み込み（ゲーム本体と同じ），読み込み後に加わる背景の層も確かめる
+
+実行方法：
+    python benchmarks/check_dirty.py
+    python benchmarks/check_dirty.py --bg parallax --frames 600
+"""
+import argparse
+import os
+import random
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pygame as pg
+
+import main as game
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bg", choices=list(game.BG_LAYERS), default="static", help="背景の種類")
+    parser.add_argument("--frames", type=int, default=500, help="比べるフレーム数")
+    parser.add_argument("--seed", type=int, default=1, help="乱数のシード")
+    args = parser.parse_args()
+
+    pg.init()
+    pg.display.set_mode((game.WIDTH, game.HEIGHT))
+    game.Assets.start_streaming()
+    game.Assets.after_streaming(lambda: game.BeamAtlas.build(15))
+    game.Assets.after_streaming(*[lambda num=num: game.Bird.build_bank([num]) for num in range(10)])
+    game.Assets.after_streaming(*game.Enemy.cache_tasks(), *game.BossEnemy.cache_tasks())
+
+    background = game.Background(game.BG_LAYERS[args.bg])
+    screens = [pg.Surface((game.GAME_WIDTH, game.HEIGHT)).convert() for _ in range(2)]
+    dirty = game.DirtyRenderer(screens[0], background, enabled=True)
+    full = game.DirtyRenderer(screens[1], background, enabled=False)
+    world = game.World(screens[1], random.Random(args.seed))
+    left, right = game.KeyState({pg.K_SPACE, pg.K_LEFT}), game.KeyState({pg.K_SPACE, pg.K_RIGHT})
+
+    bad = 0
+    for n in range(args.frames):
+        game.Assets.pump()
+        world.step(left if (n // 40) % 2 else right, [])
+        for renderer in (dirty, full):
+            world.render(renderer)
+            renderer.present()
+        diff = int((pg.surfarray.pixels3d(screens[0]) != pg.surfarray.pixels3d(screens[1])).any(axis=2).sum())
+        if diff:
+            bad += 1
+            if bad <= 5:
+                print(f"frame {world.tmr}: {diff} pixels differ")
+        if world.game_over:
+            break
+    print(f"{args.bg}: {n + 1} frames, {bad} frames differ")
+    pg.quit()
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
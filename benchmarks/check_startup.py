@@ -0,0 +1,68 @@
+"""
+起動時の画像読み込みのチェック
+ゲーム本体と同じく画像を別スレッドで読み込みながら，ビームを撃ち続けて被弾するまでゲームを進め，
+・最初のフレーム以降にメインスレッドでディスクを読まなかったか（Assets.late_loads() == 0）
+・同じ画像を2回読み込まなかったか（同期読み込み＋スレッドでのデコード＝画像の数）
+を確かめる
+ディスクが遅い場合を想定して，最初の--pump-delayフレームはデコード済みの画像を取り込まない
+（既定ではゲームオーバーまで取り込まないので，ゲーム中に使う画像は全てAssets.firstに入っている必要がある）
+
+実行方法：
+    python benchmarks/check_startup.py
+    python benchmarks/check_startup.py --seed 3 --frames 2000 --pump-delay 0
+"""
+import argparse
+import os
+import random
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame as pg
+
+import main as game
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=1000, help="最大フレーム数")
+    parser.add_argument("--seed", type=int, default=1, help="乱数のシード")
+    parser.add_argument("--pump-delay", type=int, default=1000, help="画像の取り込みを始めるフレーム")
+    args = parser.parse_args()
+
+    pg.init()
+    pg.display.set_mode((game.WIDTH, game.HEIGHT))
+    game.Assets.start_streaming()
+    game.Assets.after_streaming(lambda: game.BeamAtlas.build(15))
+    game.Assets.after_streaming(*[lambda num=num: game.Bird.build_bank([num]) for num in range(10)])
+    game.Assets.after_streaming(*game.Enemy.cache_tasks(), *game.BossEnemy.cache_tasks())
+
+    screen = pg.Surface((game.GAME_WIDTH, game.HEIGHT)).convert()
+    renderer = game.DirtyRenderer(screen, game.Background(game.BG_LAYERS["parallax"]), enabled=False)
+    world = game.World(screen, random.Random(args.seed))
+    left, right = game.KeyState({pg.K_SPACE, pg.K_LEFT}), game.KeyState({pg.K_SPACE, pg.K_RIGHT})
+    game.Assets.finish_startup()
+    startup = game.Assets.load_count
+    for n in range(args.frames):
+        if n >= args.pump_delay:
+            game.Assets.pump()
+        world.step(left if (n // 40) % 2 else right, [])
+        world.render(renderer)
+        if world.game_over:
+            break
+    while game.Assets.pump():
+        pass
+
+    late = game.Assets.late_loads()
+    reads = game.Assets.load_count + game.Assets.decode_count
+    files = len(game.Assets._files())
+    print(f"{world.tmr} frames (game over: {world.game_over}), startup loads {startup}, "
+          f"late loads {late}, reads {reads} / {files} files")
+    pg.quit()
+    return 1 if late or reads != files else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+シナリオベンチマークの実行スクリプト
+各シナリオをヘッドレスで実行し，フレーム/秒・1フレームの処理時間の分位点・最大メモリ使用量を
+baseline.json の値と比較して表示する
+
+実行方法：
+    python benchmarks/run.py                     # 計測してベースラインと比較
+    python benchmarks/run.py --update-baseline   # 計測結果をベースラインとして保存
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pygame as pg
+
+import main as game
+from scenarios import SCENARIOS
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TOLERANCE = 0.15  # これ以上遅くなったら回帰として表示する（計測のぶれを考慮）
+
+
+def measure(cls, screen: pg.Surface, frames: int, mem_frames: int) -> dict[str, float]:
+    """
+    シナリオを実行して計測結果を返す
+    メモリ計測（tracemalloc）は処理を遅くするため，時間計測とは別に短く実行する
+    """
+    scenario = cls(screen)
+    times = np.empty(frames)
+    for i in range(frames):
+        t = time.perf_counter()
+        scenario.step()
+        times[i] = time.perf_counter() - t
+
+    scenario = cls(screen)
+    tracemalloc.start()
+    for _ in range(mem_frames):
+        scenario.step()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = times * 1000
+    return {
+        "fps": round(frames / times.sum(), 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=1000, help="1シナリオあたりの計測フレーム数")
+    parser.add_argument("--mem-frames", type=int, default=200, help="メモリ計測のフレーム数")
+    parser.add_argument("--only", default=None, help="指定した名前のシナリオだけ実行する")
+    parser.add_argument("--baseline", default=BASELINE, help="比較に使うベースラインJSON")
+    parser.add_argument("--update-baseline", action="store_true", help="計測結果をベースラインとして保存する")
+    args = parser.parse_args()
+
+    pg.init()
+    root = pg.display.set_mode((game.WIDTH, game.HEIGHT))
+    screen = root.subsurface((0, 0, game.GAME_WIDTH, game.HEIGHT))
+    game.Assets.load_all()
+    game.BeamAtlas.build(15)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressed = False
+    print(f"{'scenario':18s}{'fps':>9s}{'p50':>8s}{'p95':>8s}{'p99':>8s}{'max':>8s}{'peak KB':>10s}  vs baseline")
+    for cls in SCENARIOS:
+        if args.only and cls.name != args.only:
+            continue
+        r = results[cls.name] = measure(cls, screen, args.frames, args.mem_frames)
+        note = ""
+        if cls.name in baseline:
+            ratio = r["fps"] / baseline[cls.name]["fps"] - 1
+            note = f"{ratio:+.1%} fps"
+            if ratio < -TOLERANCE:
+                note += "  REGRESSION"
+                regressed = True
+        print(f"{cls.name:18s}{r['fps']:9.1f}{r['p50_ms']:8.2f}{r['p95_ms']:8.2f}{r['p99_ms']:8.2f}{r['max_ms']:8.2f}{r['peak_kb']:10.1f}  {note}")
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"saved {args.baseline}")
+    pg.quit()
+    return 1 if regressed and not args.update_baseline else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+ベンチマーク用のシナリオ集
+main.py のクラス（Bird, Enemy, BossEnemy, EnemyAttack, Pattern, NeoBeam, BulletField, ExplosionField, Gravity, Scheduler）を
+ヘッドレスで決められた手順どおりに動かし，1フレーム分の処理を step() として返す
+"""
+import random
+
+import pygame as pg
+
+import main as game
+
+
+class Scenario:
+    """
+    シナリオの共通部分（画面・こうかとん・各グループ）を持つクラス
+    """
+    name = ""
+
+    def __init__(self, screen: pg.Surface, seed: int = 0):
+        self.screen = screen
+        self.rng = random.Random(seed)
+        self.bg = game.Assets.get("haikei_2")
+        self.bird = game.Bird(3, (game.GAME_WIDTH//2, game.HEIGHT - 100))
+        self.bird.invincible = True  # 被弾で止まらないよう常に無敵
+        self.bombs = game.BulletField(rng=self.rng)
+        self.beams = pg.sprite.Group()
+        self.beam_grid = game.SpatialHash()
+        self.emys = pg.sprite.Group()
+        self.exps = game.ExplosionField()
+        self.gravities = pg.sprite.Group()
+        self.timers = game.Scheduler()
+        self.tmr = 0
+
+    def logic(self):
+        """
+        シナリオ固有の処理（敵の出現・攻撃など）
+        """
+
+    def collide(self):
+        hits = self.beam_grid.collide_group(self.emys, True, game.collide_mask)
+        for emy, hit_beams in hits.items():
+            for beam in hit_beams:
+                emy.hp -= beam.attack
+            if emy.hp <= 0:
+                self.exps.add(emy, 100)
+                emy.kill()
+        self.exps.add_many(self.bombs.kill(self.bombs.collide_rect(self.bird.rect)), 50)
+
+    def step(self):
+        """
+        1フレーム分（ロジック＋描画）を進める
+        """
+        self.logic()
+        self.beam_grid.sync(self.beams)
+        self.collide()
+        self.beams.update()
+        self.emys.update()
+        self.bombs.update()
+        self.exps.update()
+        self.timers.run(self.tmr)
+
+        self.screen.blit(self.bg, (0, 0))
+        self.screen.blit(self.bird.image, self.bird.rect)
+        self.beams.draw(self.screen)
+        self.emys.draw(self.screen)
+        self.screen.blits([emy.hp_bar() for emy in self.emys], doreturn=False)
+        self.bombs.draw(self.screen)
+        self.gravities.draw(self.screen)
+        self.exps.draw(self.screen)
+        self.tmr += 1
+
+    def fire(self, emy: game.Enemy):
+        """
+        main()の通常敵と同じ確率で攻撃パターンを選んで撃つ
+        """
+        game.ENEMY_SCRIPT.fire(game.EnemyAttack(emy, self.bird, self.bombs), self.rng.randint(0, 100), self.tmr)
+
+class BossRing(Scenario):
+    """
+    ボスが10フレームごとに360度20方向の弾をばらまき続ける
+    """
+    name = "boss_ring"
+
+    def __init__(self, screen: pg.Surface, seed: int = 0):
+        super().__init__(screen, seed)
+        self.boss = game.BossEnemy(6, self.rng)
+        self.emys.add(self.boss)
+
+    patterns = [game.Pattern("ring", 20, 5, rate=10), game.Pattern("aimed", 1, 10, rate=8)]
+
+    def logic(self):
+        atk = game.EnemyAttack(self.boss, self.bird, self.bombs)
+        for pattern in self.patterns:
+            if pattern.due(self.tmr):
+                atk.shoot(pattern, self.tmr)
+
+
+class RapidFireSkill(Scenario):
+    """
+    スキル発動中（連射状態）で5方向ビームを撃ち続け，硬い敵20体に当て続ける
+    """
+    name = "rapid_fire_skill"
+
+    def __init__(self, screen: pg.Surface, seed: int = 0):
+        super().__init__(screen, seed)
+        for i in range(20):
+            emy = game.Enemy(1, self.rng)
+            emy.rect.center = 45 + i * 43, 80 + (i % 4) * 60
+            emy.vy = 0
+            emy.state = "stop"
+            emy.interval = 10**9  # 撃たせない
+            emy.max_hp = emy.hp = 10**9
+            self.emys.add(emy)
+
+    def logic(self):
+        if not self.bird.rapid_fire:
+            self.bird.skill(1)
+        keys = {pg.K_LEFT} if (self.tmr // 40) % 2 else {pg.K_RIGHT}
+        self.bird.update(game.KeyState(keys))
+        if self.tmr % self.bird.shot_interval == 0:
+            self.beams.add(game.NeoBeam(self.bird, 5).gen_beams())
+
+
+class FiftyEnemies(Scenario):
+    """
+    50体の通常敵が出現済みの状態で，それぞれの間隔で撃ち続ける
+    """
+    name = "enemies_50"
+
+    def __init__(self, screen: pg.Surface, seed: int = 0):
+        super().__init__(screen, seed)
+        for _ in range(50):
+            self.emys.add(game.Enemy(3, self.rng))
+
+    def logic(self):
+        for emy in self.emys:
+            if emy.state == "stop" and self.tmr % emy.interval == 0:
+                self.fire(emy)
+                emy.state = "shoot"
+
+
+class GravityWipe(Scenario):
+    """
+    50体の敵と画面を埋める弾を用意し，重力場で一掃することを50フレームごとに繰り返す
+    """
+    name = "gravity_wipe"
+    ring = game.Pattern("ring", 40, 3)
+
+    def refill(self):
+        for _ in range(50):
+            emy = game.Enemy(3, self.rng)
+            emy.rect.center = self.rng.randrange(game.GAME_WIDTH), self.rng.randrange(game.HEIGHT//2)
+            self.emys.add(emy)
+        for emy in list(self.emys)[:25]:
+            game.EnemyAttack(emy, self.bird, self.bombs).shoot(self.ring)
+
+    def logic(self):
+        if self.tmr % 50 == 0:
+            self.refill()
+        if self.tmr % 50 == 25:
+            gravity = game.Gravity(10)
+            self.gravities.add(gravity)
+            self.timers.at(self.tmr + gravity.life - 1, gravity.kill)
+        if self.gravities:
+            self.exps.add_many(self.bombs.clear(), 50)
+            self.exps.add_many([emy.rect.center for emy in self.emys], 100)
+            for emy in self.emys:
+                emy.kill()
+
+
+SCENARIOS = [BossRing, RapidFireSkill, FiftyEnemies, GravityWipe]
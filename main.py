@@ -1,8 +1,21 @@
+import argparse
+import csv
+import heapq
+import itertools
 import math
 import os
+import queue
 import random
+import struct
 import sys
+import threading
 import time
+import weakref
+from collections import deque
+
+STARTED_AT = time.perf_counter()  # 初回描画までの時間の計測用（重いライブラリの読み込みも含める）
+
+import numpy as np
 import pygame as pg
 
 
@@ -11,7 +24,168 @@ HEIGHT = 750
 HUD_WIDTH = 300
 GAME_WIDTH = WIDTH - HUD_WIDTH # ゲーム画面の幅
 
-os.chdir(os.path.dirname(os.path.abspath(__file__)))
+FIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fig")
+
+
+class Assets:
+    """
+    fig/ 以下の画像を起動時に一度だけ読み込み，変換済みSurfaceを共有するクラス
+    キーは拡張子を除いたファイル名（例："beam", "alien1", "3"）
+    最初のフレームに不要な画像は，ゲーム開始後に別スレッドで読み込む
+    """
+    surfaces: dict[str, pg.Surface] = {}
+    derived_surfaces: dict[str, pg.Surface] = {}
+    masks: "weakref.WeakKeyDictionary[pg.Surface, pg.mask.Mask]" = weakref.WeakKeyDictionary()
+    skip = {"screen_shot.png"}  # README用のスクリーンショットは読み込まない
+    opaque = {"haikei", "haikei_1", "haikei_2"}  # 全面を覆う背景はアルファ不要
+    # 最初のフレームの描画と，最初の射撃・撃墜・被弾に必要な画像
+    first = {"haikei_2", "3", "alien1", "alien2", "alien3", "beam", "explosion", "6", "8"}
+    load_count = 0  # メインスレッドでのディスク読み込みの回数
+    decode_count = 0  # 読み込みスレッドでのディスク読み込みの回数
+    startup_count = None
+    decoded: "queue.Queue[tuple[str, pg.Surface] | None]" = queue.Queue()
+    loader: threading.Thread | None = None
+    tasks: list = []  # 全画像の読み込み後に実行する処理
+
+    @classmethod
+    def _files(cls) -> dict[str, str]:
+        """
+        キーとファイル名の対応を返す
+        """
+        return {os.path.splitext(f)[0]: f for f in sorted(os.listdir(FIG_DIR)) if f not in cls.skip}
+
+    @classmethod
+    def _convert(cls, key: str, img: pg.Surface) -> pg.Surface:
+        if key in cls.opaque:
+            return img.convert()
+        # 透過部分を持つ画像（アルファ／カラーキー）はconvert_alpha，不透明な画像はconvert
+        # （カラーキーのままconvertするとrotozoomで透過が失われるため）
+        if img.get_flags() & pg.SRCALPHA or img.get_colorkey() is not None:
+            return img.convert_alpha()
+        return img.convert()
+
+    @classmethod
+    def _load(cls, fname: str) -> pg.Surface:
+        cls.load_count += 1
+        img = pg.image.load(os.path.join(FIG_DIR, fname))
+        return cls._convert(os.path.splitext(fname)[0], img)
+
+    @classmethod
+    def load_all(cls):
+        """
+        fig/ 以下の全画像をその場で読み込む（pg.display.set_modeの後に呼ぶこと）
+        """
+        for key, fname in cls._files().items():
+            if key not in cls.surfaces:
+                cls.surfaces[key] = cls._load(fname)
+
+    @classmethod
+    def start_streaming(cls):
+        """
+        最初のフレームに必要な画像だけをその場で読み込み，残りは別スレッドでデコードする
+        デコード済みの画像はpumpでメインスレッドに取り込む（pg.display.set_modeの後に呼ぶこと）
+        """
+        files = cls._files()
+        for key in cls.first:
+            if key in files and key not in cls.surfaces:
+                cls.surfaces[key] = cls._load(files[key])
+        rest = [(key, fname) for key, fname in files.items() if key not in cls.surfaces]
+        cls.loader = threading.Thread(target=cls._decode_all, args=(rest,), daemon=True)
+        cls.loader.start()
+
+    @classmethod
+    def _decode_all(cls, files: list[tuple[str, str]]):
+        for key, fname in files:
+            if key in cls.surfaces:  # メインスレッドが先に読み込んだ画像はデコードし直さない
+                continue
+            cls.decode_count += 1
+            cls.decoded.put((key, pg.image.load(os.path.join(FIG_DIR, fname))))
+        cls.decoded.put(None)
+
+    @classmethod
+    def after_streaming(cls, *tasks):
+        """
+        全画像の読み込みが終わった後に実行する処理を登録する
+        処理はpumpが予算の範囲で1つずつ実行するので，重い処理は細かく分けて登録する
+        """
+        cls.tasks.extend(tasks)
+
+    @classmethod
+    def pump(cls, budget: float = 0.002) -> bool:
+        """
+        デコード済みの画像をbudget秒の範囲で取り込む（ゲームループから毎フレーム呼ぶ）
+        全て取り込み終えたら，登録された処理をbudget秒の範囲で1つずつ実行する（残りは次のフレームに回す）
+        戻り値：読み込み中（または処理が残っている）ならTrue
+        """
+        if cls.loader is None and not cls.tasks:
+            return False
+        end = time.perf_counter() + budget
+        while time.perf_counter() < end:
+            if cls.loader is not None:
+                try:
+                    item = cls.decoded.get_nowait()
+                except queue.Empty:
+                    return True
+                if item is not None:
+                    key, img = item
+                    if key not in cls.surfaces:
+                        cls.surfaces[key] = cls._convert(key, img)
+                    continue
+                cls.loader = None
+            elif cls.tasks:
+                cls.tasks.pop(0)()
+            if cls.loader is None and not cls.tasks:
+                return False
+        return True
+
+    @classmethod
+    def finish_startup(cls):
+        """
+        起動の完了を記録する（最初のフレームの直前に呼ぶ）
+        これ以降のメインスレッドでのディスク読み込みはlate_loadsに計上される
+        """
+        cls.startup_count = cls.load_count
+
+    @classmethod
+    def late_loads(cls) -> int:
+        """
+        起動完了後にメインスレッドで発生したディスク読み込みの回数を返す（正常なら0）
+        """
+        if cls.startup_count is None:
+            return 0
+        return cls.load_count - cls.startup_count
+
+    @classmethod
+    def get(cls, key: str) -> pg.Surface:
+        """
+        キーに対応する共有Surfaceを返す
+        未読み込みの場合はその場で読み込む（起動完了後ならlate_loadsに計上される）
+        """
+        if key not in cls.surfaces:
+            fname = cls._files().get(key)
+            if fname is None:
+                raise FileNotFoundError(os.path.join(FIG_DIR, f"{key}.*"))
+            cls.surfaces[key] = cls._load(fname)
+        return cls.surfaces[key]
+
+    @classmethod
+    def mask(cls, img: pg.Surface) -> pg.mask.Mask:
+        """
+        画像に対応する当たり判定用マスクを返す（画像ごとに一度だけ生成する）
+        """
+        mask = cls.masks.get(img)
+        if mask is None:
+            mask = cls.masks[img] = pg.mask.from_surface(img)
+        return mask
+
+    @classmethod
+    def derived(cls, key: str, factory) -> pg.Surface:
+        """
+        読み込み済み画像から加工したSurfaceを一度だけ生成して共有する
+        """
+        if key not in cls.derived_surfaces:
+            cls.derived_surfaces[key] = factory()
+        return cls.derived_surfaces[key]
 
 
 def check_bound(obj_rct: pg.Rect) -> tuple[bool, bool]:
@@ -37,6 +211,16 @@ def calc_orientation(org: pg.Rect, dst: pg.Rect) -> tuple[float, float]:
     return x_diff/norm, y_diff/norm
 
 
+def collide_mask(left: pg.sprite.Sprite, right: pg.sprite.Sprite) -> bool:
+    """
+    矩形で重なりを確認してから，キャッシュしたマスクで画素単位の当たり判定を行う関数
+    """
+    if not left.rect.colliderect(right.rect):
+        return False
+    offset = right.rect.left - left.rect.left, right.rect.top - left.rect.top
+    return Assets.mask(left.image).overlap(Assets.mask(right.image), offset) is not None
+
+
 class Bird(pg.sprite.Sprite):
     """
     ゲームキャラクター（こうかとん）に関するクラス
@@ -47,21 +231,39 @@ class Bird(pg.sprite.Sprite):
         pg.K_LEFT: (-1, 0),
         pg.K_RIGHT: (+1, 0),
     }
+    bank: dict[int, dict[tuple[int, int], pg.Surface]] = {}  # 表情番号ごとの8方向の画像
+
+    @classmethod
+    def get_imgs(cls, num: int) -> dict[tuple[int, int], pg.Surface]:
+        """
+        表情numの8方向の画像を返す（未作成ならその場で作る）
+        """
+        if num not in cls.bank:
+            img0 = pg.transform.rotozoom(Assets.get(str(num)), 0, 0.9)
+            img = pg.transform.flip(img0, True, False)
+            cls.bank[num] = {
+                (+1, 0): img,
+                (+1, -1): pg.transform.rotozoom(img, 45, 0.9),
+                (0, -1): pg.transform.rotozoom(img, 90, 0.9),
+                (-1, -1): pg.transform.rotozoom(img0, -45, 0.9),
+                (-1, 0): img0,
+                (-1, +1): pg.transform.rotozoom(img0, 45, 0.9),
+                (0, +1): pg.transform.rotozoom(img, -90, 0.9),
+                (+1, +1): pg.transform.rotozoom(img, -45, 0.9),
+            }
+        return cls.bank[num]
+
+    @classmethod
+    def build_bank(cls, nums=range(10)):
+        """
+        全ての表情の画像を作っておく（Assetsの読み込み完了後に呼ぶ）
+        """
+        for num in nums:
+            cls.get_imgs(num)
 
     def __init__(self, num: int, xy: tuple[int, int]):
         super().__init__()
-        img0 = pg.transform.rotozoom(pg.image.load(f"fig/{num}.png"), 0, 0.9)
-        img = pg.transform.flip(img0, True, False)
-        self.imgs = {
-            (+1, 0): img,
-            (+1, -1): pg.transform.rotozoom(img, 45, 0.9),
-            (0, -1): pg.transform.rotozoom(img, 90, 0.9),
-            (-1, -1): pg.transform.rotozoom(img0, -45, 0.9),
-            (-1, 0): img0,
-            (-1, +1): pg.transform.rotozoom(img0, 45, 0.9),
-            (0, +1): pg.transform.rotozoom(img, -90, 0.9),
-            (+1, +1): pg.transform.rotozoom(img, -45, 0.9),
-        }
+        self.imgs = __class__.get_imgs(num)
         self.dire = (+1, 0)
         self.image = self.imgs[self.dire]
         self.rect = self.image.get_rect()
@@ -69,25 +271,36 @@ class Bird(pg.sprite.Sprite):
         self.speed = 10
 
         self.invincible = False
-        self.invincible_timer = 0
         self.rapid_fire = False
         self.shot_interval = 10
         self.shot_timer = 0
 
-    def skill(self, skill_count: int, fps: int = 50) -> tuple[bool, int]:
+    def skill(self, skill_count: int) -> tuple[bool, int]:
+        """
+        スキル（無敵＋連射）を発動する．終了はend_skillで行う（Worldがスケジューラに予約する）
+        """
         if skill_count <= 0:
             return False, skill_count
         skill_count -= 1
         self.invincible = True
-        self.invincible_timer = fps * 5
         self.rapid_fire = True
+        self.shot_interval = 5
         return True, skill_count
 
-    def change_img(self, num: int, screen: pg.Surface):
-        self.image = pg.transform.rotozoom(pg.image.load(f"fig/{num}.png"), 0, 0.9)
-        screen.blit(self.image, self.rect)
+    def end_skill(self):
+        self.invincible = False
+        self.rapid_fire = False
+        self.shot_interval = 10
 
-    def update(self, key_lst: list[bool], screen: pg.Surface):
+    def change_img(self, num: int, screen: pg.Surface | None = None):
+        """
+        表情を一時的に変える（向きは保ったまま，次に動いたときに元の表情に戻る）
+        """
+        self.image = __class__.get_imgs(num)[self.dire]
+        if screen is not None:
+            screen.blit(self.image, self.rect)
+
+    def update(self, key_lst: list[bool], screen: pg.Surface | None = None):
         sum_mv = [0, 0]
         for k, mv in __class__.delta.items():
             if key_lst[k]:
@@ -100,40 +313,321 @@ class Bird(pg.sprite.Sprite):
             self.dire = tuple(sum_mv)
             self.image = self.imgs[self.dire]
 
-        if self.invincible:
-            self.invincible_timer -= 1
-            if self.invincible_timer <= 0:
-                self.invincible = False
-                self.rapid_fire = False
-
-        self.shot_interval = 5 if self.rapid_fire else 10
         self.shot_timer += 1
-        screen.blit(self.image, self.rect)
+        if screen is not None:
+            screen.blit(self.image, self.rect)
 
 
-class Bomb(pg.sprite.Sprite):
+class Bomb:
     """
-    爆弾に関するクラス
+    爆弾（敵弾）の見た目に関するクラス（弾そのものはBulletFieldの配列で管理する）
     """
     colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255), (0, 255, 255)]
-
-    def __init__(self, emy: "Enemy", rad: int, speed: int, angle: int):
-        super().__init__()
-        self.image = pg.Surface((2*rad, 2*rad))
-        color = random.choice(__class__.colors)
-        pg.draw.circle(self.image, color, (rad, rad), rad)
-        self.image.set_colorkey((0, 0, 0))
-        self.rect = self.image.get_rect()
-        self.rect.centerx = emy.rect.centerx
-        self.rect.centery = emy.rect.centery+emy.rect.height//2
-        radian = math.radians(angle)
-        self.vx = speed * math.cos(radian)
-        self.vy = -speed * math.sin(radian)
+    images: dict[tuple[int, tuple[int, int, int]], pg.Surface] = {}  # (半径, 色)ごとの描画済み画像
+
+    @classmethod
+    def get_image(cls, rad: int, color: tuple[int, int, int]) -> pg.Surface:
+        """
+        半径と色に対応する爆弾画像を返す（初回のみ描画する）
+        """
+        key = rad, color
+        if key not in cls.images:
+            img = pg.Surface((2*rad, 2*rad))
+            pg.draw.circle(img, color, (rad, rad), rad)
+            img.set_colorkey((0, 0, 0))
+            cls.images[key] = img
+        return cls.images[key]
+
+
+class SpatialHash:
+    """
+    ゲーム画面を一様なグリッドに分割し，当たり判定の候補を絞り込むクラス
+    スプライトは中心座標のセルに登録し，所属セルが変わったものだけ登録し直す
+    点データ（BulletFieldの弾）はセル番号順に並べた添字表（CSR形式）で管理する
+    """
+    def __init__(self, cell: int = 75, width: int = GAME_WIDTH, height: int = HEIGHT):
+        self.cell = cell
+        self.cols = -(-width // cell)
+        self.rows = -(-height // cell)
+        self.buckets: list[set[pg.sprite.Sprite]] = [set() for _ in range(self.cols*self.rows)]
+        self.where: dict[pg.sprite.Sprite, int] = {}
+        self.pad = 0
+        self.order = np.zeros(0, dtype=np.intp)
+        self.starts = np.zeros(self.cols*self.rows + 1, dtype=np.intp)
+
+    def span(self, rect: pg.Rect, pad: int = 0) -> tuple[int, int, int, int]:
+        """
+        rectが重なるセルの範囲（左列，上行，右列，下行）を返す
+        """
+        c0 = min(max((rect.left - pad) // self.cell, 0), self.cols - 1)
+        r0 = min(max((rect.top - pad) // self.cell, 0), self.rows - 1)
+        c1 = min(max((rect.right + pad - 1) // self.cell, 0), self.cols - 1)
+        r1 = min(max((rect.bottom + pad - 1) // self.cell, 0), self.rows - 1)
+        return c0, r0, c1, r1
+
+    def _cells(self, span: tuple[int, int, int, int]):
+        c0, r0, c1, r1 = span
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                yield r*self.cols + c
+
+    def move(self, spr: pg.sprite.Sprite):
+        """
+        スプライトを中心座標のセルに登録する（セルが変わっていなければ何もしない）
+        """
+        rect = spr.rect
+        x, y = rect.center
+        i = min(max(y // self.cell, 0), self.rows - 1)*self.cols + min(max(x // self.cell, 0), self.cols - 1)
+        old = self.where.get(spr)
+        if old == i:
+            return
+        if old is not None:
+            self.buckets[old].discard(spr)
+        else:
+            # 検索時に広げる幅（登録されたスプライトの最大の半径）
+            self.pad = max(self.pad, (max(rect.width, rect.height) + 1) // 2)
+        self.buckets[i].add(spr)
+        self.where[spr] = i
+
+    def remove(self, spr: pg.sprite.Sprite):
+        old = self.where.pop(spr, None)
+        if old is not None:
+            self.buckets[old].discard(spr)
+
+    def sync(self, group: pg.sprite.Group):
+        """
+        グループの現在の状態に合わせて登録内容を更新する
+        """
+        for spr in group:
+            self.move(spr)
+        if len(self.where) != len(group):
+            for spr in [spr for spr in self.where if spr not in group]:
+                self.remove(spr)
+
+    def query(self, rect: pg.Rect) -> list[pg.sprite.Sprite]:
+        """
+        rectと重なる登録済みスプライトのリストを返す
+        """
+        found = []
+        for i in self._cells(self.span(rect, self.pad)):
+            found.extend(self.buckets[i])
+        return [spr for spr in found if rect.colliderect(spr.rect)]
+
+    def collide_group(self, group: pg.sprite.Group, dokill: bool, collided=None) -> dict[pg.sprite.Sprite, list[pg.sprite.Sprite]]:
+        """
+        pg.sprite.groupcollide(group, 登録済みスプライト, False, dokill, collided)と同じ結果を返す
+        collidedは矩形で絞り込んだ候補にだけ適用される
+        """
+        hits = {}
+        for spr in group:
+            found = self.query(spr.rect)
+            if collided is not None:
+                found = [other for other in found if collided(spr, other)]
+            if not found:
+                continue
+            hits[spr] = found
+            if dokill:
+                for other in found:
+                    other.kill()
+                    self.remove(other)
+        return hits
+
+    def index_points(self, x: np.ndarray, y: np.ndarray):
+        """
+        点の座標配列から，セル番号順の添字表を作り直す
+        """
+        cx = np.clip(x // self.cell, 0, self.cols - 1).astype(np.intp)
+        cy = np.clip(y // self.cell, 0, self.rows - 1).astype(np.intp)
+        cells = cy*self.cols + cx
+        self.order = np.argsort(cells, kind="stable")
+        self.starts = np.searchsorted(cells[self.order], np.arange(self.cols*self.rows + 1))
+
+    def query_points(self, rect: pg.Rect, pad: int = 0) -> np.ndarray:
+        """
+        rectをpadだけ広げた範囲のセルに入っている点の添字配列を返す
+        """
+        c0, r0, c1, r1 = self.span(rect, pad)
+        parts = [self.order[self.starts[r*self.cols + c0]:self.starts[r*self.cols + c1 + 1]] for r in range(r0, r1 + 1)]
+        return np.concatenate(parts)
+
+
+class BulletField:
+    """
+    敵弾を構造体配列（NumPy配列）でまとめて管理するクラス
+    位置・速度・半径・色・生存フラグを配列で持ち，移動と画面外判定を一括で行う
+    """
+    def __init__(self, capacity: int = 1024, rng: random.Random | None = None):
+        self.rng = rng or random
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.rad = np.zeros(capacity, dtype=np.int16)
+        self.kind = np.zeros(capacity, dtype=np.int16)  # kind_imgsの添字（半径と色の組）
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.n = 0  # 先頭n個が使用中の要素
+        self.kinds: dict[tuple[int, tuple[int, int, int]], int] = {}
+        self.kind_imgs: list[pg.Surface] = []
+        self.grid = SpatialHash()
+        self.indexed = False  # gridの添字表が現在の配列と一致しているか
+        self.max_rad = 0
+
+    def __len__(self) -> int:
+        return int(self.alive[:self.n].sum())
+
+    def _kind(self, rad: int, color: tuple[int, int, int]) -> int:
+        key = rad, color
+        if key not in self.kinds:
+            self.kinds[key] = len(self.kind_imgs)
+            self.kind_imgs.append(Bomb.get_image(rad, color))
+        return self.kinds[key]
+
+    def _reserve(self, m: int):
+        cap = len(self.alive)
+        if self.n + m <= cap:
+            return
+        while cap < self.n + m:
+            cap *= 2
+        for name in ("pos", "vel", "rad", "kind", "alive"):
+            old = getattr(self, name)
+            new = np.zeros((cap,) + old.shape[1:], dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def emit(self, origin: pg.Rect, rad: int, speed: float, angles) -> int:
+        """
+        originの下端中央からangles（度）の各方向へ弾を一括で追加する
+        戻り値：追加した弾の数
+        """
+        angles = np.radians(np.asarray(angles, dtype=np.float32))
+        return self.emit_vel(origin, rad, speed * np.column_stack((np.cos(angles), -np.sin(angles))))
+
+    def emit_vel(self, origin: pg.Rect, rad: int, vel: np.ndarray) -> int:
+        """
+        originの下端中央から速度の表vel（弾数×2）どおりに弾を一括で追加する
+        戻り値：追加した弾の数
+        """
+        m = len(vel)
+        if m == 0:
+            return 0
+        self._reserve(m)
+        sl = slice(self.n, self.n + m)
+        self.pos[sl, 0] = origin.centerx
+        self.pos[sl, 1] = origin.centery + origin.height//2
+        self.vel[sl] = vel
+        self.rad[sl] = rad
+        self.kind[sl] = [self._kind(rad, self.rng.choice(Bomb.colors)) for _ in range(m)]
+        self.alive[sl] = True
+        self.n += m
+        self.indexed = False
+        return m
 
     def update(self):
-        self.rect.move_ip(self.vx, self.vy)
-        if check_bound(self.rect) != (True, True):
-            self.kill()
+        """
+        全弾を移動させ，画面外に出た弾と死んだ弾を取り除いて詰め直す
+        """
+        n = self.n
+        pos, rad = self.pos[:n], self.rad[:n]
+        pos += self.vel[:n]
+        self.indexed = False
+        keep = self.alive[:n].copy()
+        keep &= pos[:, 0] - rad >= 0
+        keep &= pos[:, 0] + rad <= GAME_WIDTH
+        keep &= pos[:, 1] - rad >= 0
+        keep &= pos[:, 1] + rad <= HEIGHT
+        if keep.all():
+            return
+        m = int(keep.sum())
+        for arr in (self.pos, self.vel, self.rad, self.kind, self.alive):
+            arr[:m] = arr[:n][keep]
+        self.alive[m:n] = False
+        self.n = m
+
+    def draw(self, screen: pg.Surface, doreturn: bool = False, alpha: float = 1.0) -> list[pg.Rect] | None:
+        """
+        生存している弾をSurface.blitsでまとめて描画する
+        doreturnがTrueなら描画した矩形のリストを返す
+        alpha：1未満なら直前のステップとの間を補間した位置に描く
+        """
+        n = self.n
+        live = self.alive[:n]
+        pos = self.pos[:n][live]
+        if alpha < 1.0:
+            pos = pos - self.vel[:n][live]*(1.0 - alpha)
+        tl = (pos - self.rad[:n][live, None]).astype(np.int32).tolist()
+        imgs = self.kind_imgs
+        return screen.blits(zip([imgs[k] for k in self.kind[:n][live].tolist()], tl), doreturn=doreturn)
+
+    def collide_rect(self, rect: pg.Rect) -> np.ndarray:
+        """
+        rectと重なっている生存弾の添字配列を返す
+        矩形同士で候補を絞ってから，円と矩形の判定を行う
+        """
+        n = self.n
+        if not self.indexed:
+            self.grid.index_points(self.pos[:n, 0], self.pos[:n, 1])
+            self.max_rad = int(self.rad[:n].max()) if n else 0
+            self.indexed = True
+        idx = self.grid.query_points(rect, self.max_rad)
+        x, y, rad = self.pos[idx, 0], self.pos[idx, 1], self.rad[idx]
+        hit = self.alive[idx] & (x + rad > rect.left) & (x - rad < rect.right) & (y + rad > rect.top) & (y - rad < rect.bottom)
+        idx, x, y, rad = idx[hit], x[hit], y[hit], rad[hit]
+        # 弾は円なので，矩形内で円の中心に最も近い点までの距離で判定する
+        dx = x - np.clip(x, rect.left, rect.right)
+        dy = y - np.clip(y, rect.top, rect.bottom)
+        return idx[dx*dx + dy*dy < rad.astype(np.float32)**2]
+
+    def kill(self, idx: np.ndarray) -> list[tuple[int, int]]:
+        """
+        指定した弾を消し，その中心座標のリストを返す（爆発エフェクト用）
+        """
+        self.alive[idx] = False
+        return [tuple(c) for c in self.pos[idx].astype(np.int32).tolist()]
+
+    def clear(self) -> list[tuple[int, int]]:
+        """
+        全弾を消し，その中心座標のリストを返す
+        """
+        return self.kill(np.flatnonzero(self.alive[:self.n]))
+
+    def scale_speed(self, factor: float):
+        self.vel[:self.n] *= factor
+
+
+class BeamAtlas:
+    """
+    ビーム画像を量子化した角度ごとに回転させておくクラス
+    キー：量子化した角度（0以上360未満），値：(回転済みSurface, 矩形サイズ)
+    """
+    step = 15
+    table: dict[float, tuple[pg.Surface, tuple[int, int]]] = {}
+
+    @classmethod
+    def build(cls, step: float = 15):
+        """
+        step度刻みで全周分の回転画像を作る（Assets.load_allの後に呼ぶこと）
+        """
+        cls.step = step
+        cls.table = {}
+        base = Assets.get("beam")
+        n = round(360 / step)
+        for i in range(n):
+            key = cls.quantize(i * step)
+            img = pg.transform.rotozoom(base, key, 1.0)
+            cls.table[key] = img, img.get_size()
+
+    @classmethod
+    def quantize(cls, angle: float) -> float:
+        return round(angle / cls.step) * cls.step % 360
+
+    @classmethod
+    def get(cls, angle: float) -> tuple[pg.Surface, tuple[int, int]]:
+        """
+        角度に最も近い回転済み画像とそのサイズを返す
+        """
+        key = cls.quantize(angle)
+        if key not in cls.table:
+            img = pg.transform.rotozoom(Assets.get("beam"), key, 1.0)
+            cls.table[key] = img, img.get_size()
+        return cls.table[key]
 
 
 class Beam(pg.sprite.Sprite):
@@ -144,10 +638,10 @@ class Beam(pg.sprite.Sprite):
         super().__init__()
         self.vx, self.vy = bird.dire
         angle = 90
-        self.image = pg.transform.rotozoom(pg.image.load(f"fig/beam.png"), angle + angle0, 1.0)
+        self.image, size = BeamAtlas.get(angle + angle0)
         self.vx = math.cos(math.radians(angle + angle0))
         self.vy = -math.sin(math.radians(angle + angle0))
-        self.rect = self.image.get_rect()
+        self.rect = pg.Rect((0, 0), size)
         self.rect.centery = bird.rect.centery+bird.rect.height*self.vy
         self.rect.centerx = bird.rect.centerx+bird.rect.width*self.vx
         self.speed = 10
@@ -177,43 +671,164 @@ class NeoBeam(pg.sprite.Sprite):
         return beams
 
 
-class Explosion(pg.sprite.Sprite):
+class ExplosionField:
     """
-    爆発に関するクラス
+    爆発エフェクトを配列（NumPy配列）でまとめて管理するクラス
+    左上座標と残り寿命だけを配列で持ち，画像は全ての爆発で共有の2コマを使う
     """
-    def __init__(self, obj: "Bomb|Enemy", life: int):
-        super().__init__()
-        img = pg.image.load(f"fig/explosion.gif")
-        self.imgs = [img, pg.transform.flip(img, 1, 1)]
-        self.image = self.imgs[0]
-        self.rect = self.image.get_rect(center=obj.rect.center)
-        self.life = life
+    frames: list[pg.Surface] = []  # 共有のコマ画像（通常，上下左右反転）
+
+    @classmethod
+    def get_frames(cls) -> list[pg.Surface]:
+        if not cls.frames:
+            img = Assets.get("explosion")
+            cls.frames = [img, Assets.derived("explosion_flip", lambda: pg.transform.flip(img, 1, 1))]
+        return cls.frames
+
+    def __init__(self, capacity: int = 256):
+        self.pos = np.zeros((capacity, 2), dtype=np.int32)  # 左上座標
+        self.life = np.zeros(capacity, dtype=np.int32)
+        self.n = 0  # 先頭n個が使用中の要素
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _reserve(self, m: int):
+        cap = len(self.life)
+        if self.n + m <= cap:
+            return
+        while cap < self.n + m:
+            cap *= 2
+        for name in ("pos", "life"):
+            old = getattr(self, name)
+            new = np.zeros((cap,) + old.shape[1:], dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def add(self, obj: "Enemy|tuple[int, int]", life: int):
+        """
+        objの中心（または座標のタプル）に寿命lifeフレームの爆発を追加する
+        """
+        self.add_many([obj if isinstance(obj, tuple) else obj.rect.center], life)
+
+    def add_many(self, centers: list[tuple[int, int]], life: int) -> int:
+        """
+        centersの各座標に爆発を一括で追加する
+        戻り値：追加した爆発の数
+        """
+        m = len(centers)
+        if m == 0:
+            return 0
+        self._reserve(m)
+        w, h = self.get_frames()[0].get_size()
+        sl = slice(self.n, self.n + m)
+        self.pos[sl] = np.asarray(centers, dtype=np.int32).reshape(m, 2) - (w//2, h//2)
+        self.life[sl] = life
+        self.n += m
+        return m
 
     def update(self):
-        self.life -= 1
-        self.image = self.imgs[self.life//10 % 2]
-        if self.life < 0:
-            self.kill()
+        """
+        寿命を1減らし，尽きた爆発を取り除いて詰め直す
+        """
+        n = self.n
+        if n == 0:
+            return
+        self.life[:n] -= 1
+        live = self.life[:n] >= 0
+        if not live.all():
+            m = int(live.sum())
+            self.pos[:m] = self.pos[:n][live]
+            self.life[:m] = self.life[:n][live]
+            self.n = m
+
+    def draw(self, screen: pg.Surface, doreturn: bool = False):
+        """
+        全ての爆発を1回のblitsで描画する（10フレームごとにコマを切り替える）
+        """
+        n = self.n
+        if n == 0:
+            return []
+        frames = self.get_frames()
+        idx = (self.life[:n] // 10 % 2).tolist()
+        return screen.blits(zip([frames[i] for i in idx], self.pos[:n].tolist()), doreturn=doreturn)
+
+    def clear(self):
+        self.n = 0
+
+
+class HPBar:
+    """
+    体力バーの画像を（幅, 高さ, 緑の部分の幅）ごとに1枚だけ作って使い回すクラス
+    緑の部分の幅（残り割合を画素単位に量子化したもの）が同じなら全ての敵機で同じ画像を共有する
+    """
+    images: dict[tuple[int, int, int], pg.Surface] = {}
+
+    @classmethod
+    def get(cls, width: int, height: int, ratio: float) -> pg.Surface:
+        fill = int(width * max(ratio, 0))
+        key = width, height, fill
+        if key not in cls.images:
+            img = pg.Surface((width, height)).convert()
+            img.fill((255, 0, 0))
+            img.fill((0, 255, 0), (0, 0, fill, height))
+            cls.images[key] = img
+        return cls.images[key]
 
 
 class Enemy(pg.sprite.Sprite):
     """
     敵機に関するクラス
     """
-    imgs = [pg.image.load(f"fig/alien{i}.png") for i in range(1, 4)]
-
-    def __init__(self, level: int = 1):
+    img_keys = [f"alien{i}" for i in range(1, 4)]
+    scale = 0.8
+    base_hp = 3  # 体力はbase_hp＋レベル
+    bar_height = 5  # 体力バーの高さと，機体との間隔
+    bar_gap = 2
+
+    @classmethod
+    def get_img(cls, key: str, emp: bool = False) -> pg.Surface:
+        """
+        このクラスの倍率で拡大縮小した敵機画像を返す（emp=TrueならEMPを受けた見た目）
+        画像はAssetsに一度だけ作られ，全ての敵機で共有される
+        """
+        name = f"{key}@{cls.scale}"
+        img = Assets.derived(name, lambda: pg.transform.rotozoom(Assets.get(key), 0, cls.scale))
+        if emp:
+            return Assets.derived(f"{name}/emp", lambda: pg.transform.laplacian(img))
+        return img
+
+    @classmethod
+    def cache_tasks(cls) -> list:
+        """
+        敵機画像（通常とEMP用）を1枚ずつ作る処理のリストを返す（Assets.after_streamingで少しずつ作るため）
+        """
+        return [lambda key=key, emp=emp: cls.get_img(key, emp) for key in cls.img_keys for emp in (False, True)]
+
+    @classmethod
+    def build_cache(cls):
+        """
+        全ての敵機画像（通常とEMP用）を作っておく（Assetsの読み込み完了後に呼ぶ）
+        """
+        for task in cls.cache_tasks():
+            task()
+
+    def __init__(self, level: int = 1, rng: random.Random | None = None):
         super().__init__()
-        self.image = pg.transform.rotozoom(random.choice(__class__.imgs), 0, 0.8)
-        self.rect = self.image.get_rect(center=(random.randint(0, GAME_WIDTH), 0))
+        self.rng = rng = rng or random
+        self.img_key = rng.choice(__class__.img_keys)
+        self.image = __class__.get_img(self.img_key)
+        self.rect = self.image.get_rect(center=(rng.randint(0, GAME_WIDTH), 0))
         self.vx, self.vy = 0, +6
-        self.bound = random.randint(50, HEIGHT//2)
+        self.bound = rng.randint(50, HEIGHT//2)
         self.state = "moving"
-        self.interval = random.randint(50, 80)
-        self.max_hp = 3 + level
+        self.interval = rng.randint(50, 80)
+        self.max_hp = __class__.base_hp + level
         self.hp = self.max_hp
         self.offset_frames = 0
         self.ready_to_shoot = True
+        self.bar_key = None  # 体力バーを作ったときの（体力, 幅）
+        self.bar_img = None
         
 
     def update(self):
@@ -229,8 +844,8 @@ class Enemy(pg.sprite.Sprite):
 
         elif self.state == "shoot":
             self.offset_frames = 20
-            self.offset_vx = random.randint(-3, 3)
-            self.offset_vy = random.randint(-3, 3)
+            self.offset_vx = self.rng.randint(-3, 3)
+            self.offset_vy = self.rng.randint(-3, 3)
             self.state = "offset"
 
         elif self.state == "offset":
@@ -241,66 +856,184 @@ class Enemy(pg.sprite.Sprite):
             else:
                 self.state = "stop"
 
-    def draw_hp(self, screen: pg.Surface):
-        bar_width = self.rect.width
-        bar_height = 5
-        hp_ratio = max(self.hp / self.max_hp, 0)
-        fill_width = int(bar_width * hp_ratio)
-        bg_rect = pg.Rect(self.rect.left, self.rect.top - bar_height - 2, bar_width, bar_height) 
-        pg.draw.rect(screen, (255, 0, 0), bg_rect) 
-        fg_rect = pg.Rect(self.rect.left, self.rect.top - bar_height - 2, fill_width, bar_height) 
-        pg.draw.rect(screen, (0, 255, 0), fg_rect)
+    def hp_bar(self) -> tuple[pg.Surface, tuple[int, int]]:
+        """
+        体力バーの画像と描く位置を返す（Surface.blitsにそのまま渡せる形）
+        画像は体力か幅が変わったときだけ取り替える
+        """
+        key = self.hp, self.rect.width
+        if key != self.bar_key:
+            self.bar_key = key
+            self.bar_img = HPBar.get(self.rect.width, self.bar_height, self.hp / self.max_hp)
+        return self.bar_img, (self.rect.left, self.rect.top - self.bar_height - self.bar_gap)
+
+
+class Pattern:
+    """
+    弾幕の1パターンを宣言的に表すクラス
+    kind："fan"（下向きの扇形），"aimed"（こうかとん狙いの扇形），"ring"（全周に等間隔），"spiral"（撃つたびに回転する全周）
+    count：1回の弾数，speed：弾の速さ，rad：弾の半径，spread：扇の広がり（度）
+    rate，offset：tmr % rate == offset のフレームで撃つ，turn：spiralが1回ごとに回る角度（度）
+    角度の並びと単位速度ベクトルの表は生成時に一度だけNumPyで計算しておく
+    """
+    cache: dict[tuple, "Pattern"] = {}
+    kinds = ("fan", "aimed", "ring", "spiral")
+
+    def __init__(self, kind: str, count: int, speed: float, rad: int = 10, spread: int = 0,
+                 rate: int = 1, offset: int = 0, turn: float = 0):
+        if kind not in __class__.kinds:
+            raise ValueError(f"unknown pattern kind: {kind}")
+        self.kind = kind
+        self.count = count
+        self.speed = speed
+        self.rad = rad
+        self.spread = 360 if kind in ("ring", "spiral") else spread
+        self.rate = rate
+        self.offset = offset
+        self.turn = turn
+        if count == 1:
+            offsets = [0]
+        elif kind in ("ring", "spiral"):
+            offsets = [-180 + 360 * i / count for i in range(count)]
+        else:
+            # 修正前のkotei/jikiと同じく整数の切り捨て除算で間隔を決める
+            start = -self.spread // 2
+            step = self.spread // (count - 1)
+            offsets = [start + step * i for i in range(count)]
+        self.offsets = np.array(offsets, dtype=np.float64)
+        rads = np.radians(self.offsets)
+        self.unit = np.column_stack((np.cos(rads), np.sin(rads)))  # 基準角0度での単位ベクトル
+        self.vel = self.rotate(270)  # 下向き基準の速度の表（fan，ring用）
+
+    @classmethod
+    def cached(cls, kind: str, count: int, speed: float, rad: int = 10, spread: int = 0) -> "Pattern":
+        """
+        同じ引数のパターンを使い回す（kotei，jiki用）
+        """
+        key = (kind, count, speed, rad, spread)
+        if key not in cls.cache:
+            cls.cache[key] = cls(kind, count, speed, rad, spread)
+        return cls.cache[key]
+
+    def due(self, tmr: int) -> bool:
+        return tmr % self.rate == self.offset
+
+    def rotate(self, base_angle: float) -> np.ndarray:
+        """
+        基準角base_angle（度）での速度の表（弾数×2，画面座標系）を返す
+        """
+        c, s = math.cos(math.radians(base_angle)), math.sin(math.radians(base_angle))
+        vel = np.empty_like(self.unit)
+        vel[:, 0] = self.speed * (c * self.unit[:, 0] - s * self.unit[:, 1])
+        vel[:, 1] = -self.speed * (s * self.unit[:, 0] + c * self.unit[:, 1])
+        return vel
+
+    def base_angle(self, enemy: pg.sprite.Sprite, bird: pg.sprite.Sprite, tmr: int = 0) -> float:
+        if self.kind == "aimed":
+            dx = bird.rect.centerx - enemy.rect.centerx
+            dy = enemy.rect.centery - bird.rect.centery
+            return math.degrees(math.atan2(dy, dx))
+        if self.kind == "spiral":
+            return 270 + self.turn * (tmr // self.rate)
+        return 270
 
 
 class EnemyAttack(pg.sprite.Sprite):
     """
     敵の弾幕を設定するクラス
     """
-    def __init__(self, enemy: Enemy, bird: Bird):
+    speed_scale = 1.0  # 全ての敵弾の速さに掛ける倍率（難易度調整用）
+
+    def __init__(self, enemy: Enemy, bird: Bird, field: BulletField):
         self.enemy = enemy
         self.bird = bird
+        self.field = field
+
+    def shoot(self, pattern: Pattern, tmr: int = 0) -> int:
+        """
+        patternの弾を速度の表ごとまとめてfieldに追加する
+        戻り値：撃った弾の数
+        """
+        base = pattern.base_angle(self.enemy, self.bird, tmr)
+        scale = __class__.speed_scale
+        vel = pattern.vel if base == 270 else pattern.rotate(base)
+        return self.field.emit_vel(self.enemy.rect, pattern.rad, vel if scale == 1.0 else vel * scale)
 
     def kotei(self, rad: int, speed: int, num: int, angle_hani: int):
-        self.rad = rad
-        self.speed = speed
-        self.num = num
-        self.angle_hani = angle_hani
-        bombs = []
-        base_angle = 270  #下向き
-        if self.num == 1:
-            angle = base_angle
-            bomb = Bomb(self.enemy, rad, speed, angle)
-            bombs.append(bomb)
-        else:
-            start = -self.angle_hani // 2 
-            step = self.angle_hani // (self.num - 1)
-            for i in range(self.num):
-                angle = base_angle + start + step * i
-                bomb = Bomb(self.enemy, self.rad, self.speed, angle)
-                bombs.append(bomb)
-        return bombs
+        return self.shoot(Pattern.cached("fan", num, speed, rad, angle_hani))
 
     def jiki(self, rad: int, speed: int, num: int, angle_hani: int):
-        self.rad = rad
-        self.speed = speed
-        self.num = num
-        self.angle_hani = angle_hani
-        bombs = []
-        dx = self.bird.rect.centerx - self.enemy.rect.centerx
-        dy = self.enemy.rect.centery - self.bird.rect.centery
-        base_angle = math.degrees(math.atan2(dy, dx))
-        if self.num == 1:
-            angle = base_angle
-            bomb = Bomb(self.enemy, rad, speed, angle)
-            bombs.append(bomb)
-        else:
-            start = -self.angle_hani // 2
-            step = self.angle_hani // (self.num - 1)
-            for i in range(self.num):
-                angle = base_angle + start + step * i
-                bomb = Bomb(self.enemy, self.rad, self.speed, angle)
-                bombs.append(bomb)
-        return bombs
+        return self.shoot(Pattern.cached("aimed", num, speed, rad, angle_hani))
+
+
+class BulletScript:
+    """
+    乱数の出目ごとに撃つパターンを並べた弾幕の台本
+    table：[((出目の下限, 上限), [Pattern, ...]), ...] 先に書いた範囲が優先される
+    cycle，active：cycleフレームの周期のうち先頭activeフレームの間だけ撃つ（Noneなら常に撃つ）
+    """
+    def __init__(self, table: list[tuple[tuple[int, int], list[Pattern]]], cycle: int | None = None, active: int | None = None):
+        self.table = table
+        self.cycle = cycle
+        self.active = active
+
+    def reweighted(self, highs: list[int]) -> "BulletScript":
+        """
+        各パターンの出目の上限をhighsに置き換えた台本を返す（範囲が連続している台本用）
+        例：BOSS_SCRIPT.reweighted([10, 20, 30, 100]) で全周弾の確率を上げる
+        """
+        if len(highs) != len(self.table):
+            raise ValueError(f"expected {len(self.table)} bounds, got {len(highs)}")
+        lows = [0] + [h + 1 for h in highs[:-1]]
+        table = [((low, high), patterns) for low, high, (_, patterns) in zip(lows, highs, self.table)]
+        return BulletScript(table, self.cycle, self.active)
+
+    def next_time(self, pattern: Pattern, t: int) -> int:
+        """
+        t以降でpatternを撃つ最初の時刻（撃たない区間は飛ばす）
+        """
+        t += (pattern.offset - t) % pattern.rate
+        if self.cycle is not None:
+            while t % self.cycle >= self.active:
+                t += pattern.rate
+        return t
+
+    def select(self, roll: int) -> list[Pattern]:
+        for (low, high), patterns in self.table:
+            if low <= roll <= high:
+                return patterns
+        return []
+
+    def fire(self, attack: EnemyAttack, roll: int | None, tmr: int) -> None:
+        """
+        出目rollとtmrに応じたパターンをattackで撃つ
+        """
+        if roll is None or (self.cycle is not None and tmr % self.cycle >= self.active):
+            return
+        for pattern in self.select(roll):
+            if pattern.due(tmr):
+                attack.shoot(pattern, tmr)
+
+
+# 通常敵：撃てる状態になるたびに0～100の出目で1パターン選ぶ
+ENEMY_SCRIPT = BulletScript([
+    ((0, 20), [Pattern("fan", 5, 5, spread=60)]),
+    ((21, 60), [Pattern("aimed", 5, 5, spread=60)]),
+    ((80, 80), [Pattern("fan", 3, 2, rad=20, spread=90)]),
+    ((0, 100), [Pattern("aimed", 1, 10)]),
+])
+
+# ボス：300フレームごとに出目を振り直し，そのうち200フレームの間撃ち続ける
+BOSS_SCRIPT = BulletScript([
+    ((0, 25), [Pattern("fan", 1, 5, rad=20, rate=10),
+               Pattern("aimed", 5, 5, spread=60, rate=50)]),
+    ((26, 50), [Pattern("aimed", 1, 10, rate=8),
+                Pattern("fan", 3, 5, spread=30, rate=50)]),
+    ((51, 75), [Pattern("fan", 5, 5, spread=60, rate=50),
+                Pattern("fan", 4, 4, spread=45, rate=50),
+                Pattern("aimed", 3, 5, spread=30, rate=50, offset=25)]),
+    ((76, 100), [Pattern("ring", 20, 5, rate=10)]),
+], cycle=300, active=200)
 
 
 # class Score:
@@ -322,36 +1055,64 @@ class EnemyAttack(pg.sprite.Sprite):
 #         screen.blit(self.image, self.rect)
 
 
+class Overlay:
+    """
+    全画面エフェクト用のSurfaceを色ごとに1枚だけ持つクラス
+    画素ごとのアルファを持たないSurfaceを使い，透明度はset_alphaで切り替える
+    """
+    colors = {
+        "flash": (255, 255, 255),
+        "emp": (255, 255, 0),
+        "gravity": (0, 0, 0),
+    }
+    surfaces: dict[str, pg.Surface] = {}
+
+    @classmethod
+    def build(cls):
+        """
+        全色のSurfaceを作っておく（pg.display.set_modeの後に呼ぶ）
+        """
+        for name in cls.colors:
+            cls.get(name)
+
+    @classmethod
+    def get(cls, name: str, alpha: int | None = None) -> pg.Surface:
+        """
+        色nameのSurfaceを返す（alphaを指定した場合はその透明度にする）
+        """
+        if name not in cls.surfaces:
+            surf = pg.Surface((GAME_WIDTH, HEIGHT)).convert()
+            surf.fill(cls.colors[name])
+            cls.surfaces[name] = surf
+        surf = cls.surfaces[name]
+        if alpha is not None:
+            surf.set_alpha(alpha)
+        return surf
+
+
 class EMP(pg.sprite.Sprite):
     """
     発動時に存在する敵機と爆弾を無効化するクラス
+    life：表示するステップ数（消す時刻はWorldのスケジューラに予約する）
     """
-    def __init__(self, emy_group: pg.sprite.Group, bomb_group: pg.sprite.Group, screen: pg.Surface, life_frames: int = 3):
+    def __init__(self, emy_group: pg.sprite.Group, bomb_group: BulletField, screen: pg.Surface, life_frames: int = 3):
         super().__init__()
         # 修正：エフェクトのサイズをゲーム画面幅に合わせる
-        surf = pg.Surface((GAME_WIDTH, HEIGHT), flags=pg.SRCALPHA)
-        surf.fill((255, 255, 0, 100))  # 透過黄色
-        self.image = surf
+        self.image = Overlay.get("emp", 100)  # 透過黄色
         self.rect = self.image.get_rect()
         self.life = life_frames
         
         for emy in list(emy_group):
             emy.interval = math.inf
             emy.disabled_by_emp = True
-            emy.image = pg.transform.laplacian(emy.image)
-        for bomb in list(bomb_group):
-            bomb.speed /= 2
-            bomb.inactive = True
-
-    def update(self):
-        self.life -= 1
-        if self.life < 0:
-            self.kill()
+            emy.image = emy.get_img(emy.img_key, True)
+        bomb_group.scale_speed(0.5)
 
 
 class shield(pg.sprite.Sprite):
     """
     防御壁を展開するクラス
+    life：展開しておくステップ数（消す時刻はWorldのスケジューラに予約する）
     """
     def __init__(self, bird, life = 400):
         super().__init__()
@@ -368,39 +1129,35 @@ class shield(pg.sprite.Sprite):
         self.rect.center = (self.rect.centerx, self.rect.centery)
         self.life = life
 
-    def update(self):
-        self.life -= 1
-        if self.life < 0:
-            self.kill()
-
 
 class Gravity(pg.sprite.Sprite):
     """
     重力場（半透明の黒い矩形）に関するクラス
+    life：存在するステップ数（消す時刻はWorldのスケジューラに予約する）
     """
     def __init__(self, life: int):
         super().__init__()
         self.life = life
         # 修正：重力場のサイズをゲーム画面幅に合わせる
-        self.image = pg.Surface((GAME_WIDTH, HEIGHT))
-        pg.draw.rect(self.image,(0, 0, 0),(0, 0, GAME_WIDTH, HEIGHT))
-        self.image.set_alpha(128)
+        self.image = Overlay.get("gravity", 128)
         self.rect = self.image.get_rect()
 
-    def update(self):
-        self.life -= 1
-        if self.life <= 0:
-            self.kill()
-
 
 class BossEnemy(Enemy):
-    def __init__(self, level: int = 5):
-        super().__init__(level)
-        self.image = pg.transform.rotozoom(random.choice(__class__.imgs), 0, 3.0)
+    scale = 3.0
+    base_hp = 50
+    hp_per_level = 10
+    bar_height = 15
+    bar_gap = 5
+
+    def __init__(self, level: int = 5, rng: random.Random | None = None):
+        super().__init__(level, rng)
+        self.img_key = self.rng.choice(__class__.img_keys)
+        self.image = __class__.get_img(self.img_key)
         self.rect = self.image.get_rect()
         self.rect.center = GAME_WIDTH//2, 100 # 出現位置をGAME_WIDTH中心に
         self.vx, self.vy = 3, 0
-        self.max_hp = 50 + level*10
+        self.max_hp = __class__.base_hp + level*__class__.hp_per_level
         self.hp = self.max_hp
         self.state = "alive"
 
@@ -409,16 +1166,6 @@ class BossEnemy(Enemy):
         if self.rect.right >= GAME_WIDTH or self.rect.left <= 0: # 範囲をGAME_WIDTHに
             self.vx *= -1
 
-    def draw_hp(self, screen: pg.Surface):
-        bar_width = self.rect.width
-        bar_height = 15
-        hp_ratio = max(self.hp / self.max_hp, 0)
-        fill_width = int(bar_width * hp_ratio)
-        bg_rect = pg.Rect(self.rect.left, self.rect.top - bar_height - 5, bar_width, bar_height)
-        pg.draw.rect(screen, (255, 0, 0), bg_rect)
-        fg_rect = pg.Rect(self.rect.left, self.rect.top - bar_height - 5, fill_width, bar_height)
-        pg.draw.rect(screen, (0, 255, 0), fg_rect)
-
 
 class SkillFlash(pg.sprite.Sprite):
     """
@@ -427,8 +1174,7 @@ class SkillFlash(pg.sprite.Sprite):
     def __init__(self, life: int = 12, alpha_hi: int = 180, alpha_lo: int = 0):
         super().__init__()
         # 修正：エフェクトをゲーム画面幅に合わせる
-        self.image = pg.Surface((GAME_WIDTH, HEIGHT), flags=pg.SRCALPHA)
-        self.image.fill((255, 255, 255, alpha_hi))
+        self.image = Overlay.get("flash", alpha_hi)
         self.rect = self.image.get_rect()
         self.life = life
         self.alpha_hi = alpha_hi
@@ -441,264 +1187,936 @@ class SkillFlash(pg.sprite.Sprite):
             self.kill()
             return
         if (self.life // self.toggle_interval) % 2 == 0:
-            self.image.fill((255, 255, 255, self.alpha_hi))
+            self.image.set_alpha(self.alpha_hi)
         else:
-            self.image.fill((255, 255, 255, self.alpha_lo))
+            self.image.set_alpha(self.alpha_lo)
 
 
-def draw_ui(screen, score, lives, skill_count, decorative_img):
+class HUD:
     """
-    UI描画関数（右画面用スクリーンを受け取るように修正）
+    右画面のUI（スコア・残機・スキル）を描画するクラス
+    フォントと固定ラベルは一度だけ作り，値が変わったときだけ描き直す
     """
-    # 修正：背景クリアの座標を (0, 0) からの相対座標に変更（screen自体がHUD用Surfaceのため）
-    pg.draw.rect(screen, (20, 20, 20), (0, 0, HUD_WIDTH, HEIGHT))
-    
-    font_title = pg.font.Font(None, 60)
-    font_big = pg.font.Font(None, 48)
-    font_mid = pg.font.Font(None, 36)
-
-    # 修正：描画開始位置 x を 20 に変更（GAME_WIDTHのオフセットを除去）
-    x = 20
-    y = 30
+    def __init__(self, decorative_img: pg.Surface | None):
+        self.font_title = pg.font.Font(None, 60)
+        self.font_big = pg.font.Font(None, 48)
+        self.font_mid = pg.font.Font(None, 36)
+        self.x = 20
+        self.score_y = 30 + 120
+        self.life_y = self.score_y + 120
+        self.skill_y = self.life_y + 120
+
+        # 背景・ラベル・装飾画像は変化しないので，1枚の下地にまとめておく
+        self.base = pg.Surface((HUD_WIDTH, HEIGHT))
+        self.base.fill((20, 20, 20))
+        x = self.x
+        self.base.blit(self.font_mid.render("GAME TITLE", True, (255, 255, 0)), (x, 30))
+        self.base.blit(self.font_title.render("Koukaton", True, (255, 100, 50)), (x, 60))
+        self.base.blit(self.font_mid.render("SCORE", True, (200, 200, 255)), (x, self.score_y))
+        self.base.blit(self.font_mid.render("LIFE", True, (255, 200, 200)), (x, self.life_y))
+        self.base.blit(self.font_mid.render("SKILL", True, (200, 255, 200)), (x, self.skill_y))
+        self.set_decoration(decorative_img)
+
+        self.score = None
+        self.lives = None
+        self.skill_count = None
+        self.score_img = None
+        self.dirty = True
+
+    def set_decoration(self, decorative_img: pg.Surface | None):
+        """
+        装飾画像を下地に描き込む（起動後に読み込まれた場合にも使う）
+        """
+        if decorative_img:
+            img_rect = decorative_img.get_rect()
+            img_x = (HUD_WIDTH - img_rect.width) // 2
+            img_y = HEIGHT - img_rect.height - 130
+            self.base.blit(decorative_img, (img_x, img_y))
+            self.dirty = True
+
+    def update(self, score: int, lives: int, skill_count: int):
+        """
+        表示する値を更新する（変化があった場合のみdirtyにする）
+        """
+        if score != self.score:
+            self.score = score
+            self.score_img = self.font_big.render(str(score), True, (255, 255, 255))
+            self.dirty = True
+        if lives != self.lives or skill_count != self.skill_count:
+            self.lives = lives
+            self.skill_count = skill_count
+            self.dirty = True
+
+    def draw(self, screen: pg.Surface) -> bool:
+        """
+        dirtyな場合のみHUD用スクリーンに描き直す
+        戻り値：描き直したかどうか
+        """
+        if not self.dirty:
+            return False
+        x = self.x
+        screen.blit(self.base, (0, 0))
+        screen.blit(self.score_img, (x, self.score_y + 30))
+        for i in range(self.lives):
+            pg.draw.circle(screen, (255, 100, 100), (x+20+i*35, self.life_y+50), 12)
+        for i in range(self.skill_count):
+            pg.draw.circle(screen, (100, 255, 100), (x+20+i*35, self.skill_y+50), 12)
+        self.dirty = False
+        return True
+
+
+class Background:
+    """
+    縦にスクロールする多層（パララックス）背景
+    各層は起動時にゲーム画面の幅へ拡大縮小・変換し，上下反転した画像と縦につないで
+    継ぎ目のない帯にしておく（タイル化）．描画は1層あたり最大2回のblit（帯の切れ目の前後）で行う
+    読み込み中の画像の層は，全画像の読み込み後に1層ずつ（拡大縮小とタイル化を別のフレームで）加える（それまでは描かない）
+    layers：[(画像名, 速さ（画素/ステップ）, 不透明度（Noneなら不透明）), ...] 先頭が一番奥の層
+    """
+    def __init__(self, layers: list[tuple[str, float, int | None]], size: tuple[int, int] = (GAME_WIDTH, HEIGHT)):
+        self.w, self.h = size
+        self.moving = any(speed for _, speed, _ in layers)
+        self.revision = 0  # 層を加えて1枚絵を描き直すたびに増やす（差分描画側で全体を描き直すため）
+        # 最初のフレームに必要な画像（Assets.first）以外をここで読み込むと，
+        # 起動が遅れる上に読み込みスレッドでも同じ画像をデコードすることになる
+        self.layers = [(self.tile(key) if key in Assets.surfaces or Assets.loader is None else None, speed, alpha)
+                       for key, speed, alpha in layers]
+        # 止まっている背景を差分描画で復元するための1枚絵
+        self.still = pg.Surface(size).convert()
+        self.draw(self.still, 0)
+        for i, (key, _, _) in enumerate(layers):
+            if self.layers[i][0] is None:
+                Assets.after_streaming(lambda key=key: self.scaled(key), lambda i=i, key=key: self.build_layer(i, key))
+
+    def build_layer(self, i: int, key: str):
+        """
+        読み込みを待っていたi番目の層をタイル化して加える
+        """
+        _, speed, alpha = self.layers[i]
+        self.layers[i] = self.tile(key), speed, alpha
+        if not self.moving:
+            self.draw(self.still, 0)
+        self.revision += 1
+
+    def scaled(self, key: str) -> pg.Surface:
+        """
+        画像keyを画面幅に合わせて拡大縮小した画像を返す
+        """
+        img = Assets.get(key)
+        w, h = img.get_size()
+        if w == self.w:
+            return img
+        return Assets.derived(f"{key}@w{self.w}", lambda: pg.transform.smoothscale(img, (self.w, round(h * self.w / w))))
+
+    def tile(self, key: str) -> pg.Surface:
+        """
+        画像keyを画面幅に合わせ，反転した画像と交互に画面の高さ以上になるまでつないだ帯を返す
+        """
+        def build() -> pg.Surface:
+            img = self.scaled(key)
+            h = img.get_height()
+            imgs = [img, pg.transform.flip(img, False, True)]
+            n = 2 * math.ceil(self.h / (2 * h))  # 反転した画像で終わるようにして上下の継ぎ目をなくす
+            tile = pg.Surface((self.w, h * n)).convert()
+            tile.blits([(imgs[i % 2], (0, h * i)) for i in range(n)], doreturn=False)
+            return tile
+        return Assets.derived(f"{key}@tile{self.w}x{self.h}", build)
+
+    def draw(self, screen: pg.Surface, t: float):
+        """
+        時刻t（ステップ数，補間中は小数）の背景を描く
+        """
+        for tile, speed, alpha in self.layers:
+            if tile is None:
+                continue
+            period = tile.get_height()
+            top = int(-t * speed) % period  # 画面の上端に来る帯の行
+            first = min(self.h, period - top)
+            tile.set_alpha(alpha)
+            screen.blit(tile, (0, 0), (0, top, self.w, first))
+            if first < self.h:
+                screen.blit(tile, (0, first), (0, 0, self.w, self.h - first))
+
+    def restore(self, screen: pg.Surface, rects: list[pg.Rect]):
+        """
+        止まっている背景の，rectsの部分だけを描き直す
+        """
+        screen.blits([(self.still, r, r) for r in rects], doreturn=False)
+
+
+# 背景の層の組み合わせ（--bgで選ぶ）
+BG_LAYERS = {
+    "static": [("haikei_2", 0, None)],
+    "scroll": [("haikei_2", 1, None)],
+    "parallax": [("haikei_2", 1, None), ("haikei_1", 2, 48), ("haikei", 3, 32)],
+}
+
+
+class DirtyRenderer:
+    """
+    前フレームで描いた矩形の下だけ背景を復元し，変化した領域だけ画面を更新する描画クラス
+    enabledがFalseの場合や全画面エフェクト中，背景がスクロールしている場合は，毎フレーム全体を描き直す
+    screenは表示用Surfaceのサブサーフェスで，描画はそのままウィンドウに反映される
+    """
+    def __init__(self, screen: pg.Surface, bg: Background, enabled: bool = True, max_rects: int = 300):
+        self.screen = screen
+        self.bg = bg
+        self.enabled = enabled
+        self.max_rects = max_rects  # これを超えたら矩形ごとの更新より全体更新の方が速い
+        self.area = screen.get_rect()
+        self.offset = screen.get_abs_offset()
+        self.prev: list[pg.Rect] = []
+        self.rects: list[pg.Rect] = []
+        self.full = True
+        # 画面にまだ背景全体を描いていない（最初のフレームや背景の1枚絵が変わった後）
+        self.need_full = True
+        self.bg_revision = bg.revision
+        self.alpha = 1.0  # 補間係数（1なら最新の位置に描く）
+        self.prev_pos: dict[pg.sprite.Sprite, tuple[int, int]] = {}
+
+    def snapshot(self, *sprites):
+        """
+        補間用に，シミュレーションを1ステップ進める前の位置を記録する
+        """
+        self.prev_pos = {spr: spr.rect.topleft for spr in sprites}
+
+    def place(self, spr: pg.sprite.Sprite):
+        """
+        スプライトを描く位置（補間中なら直前の位置との間）を返す
+        """
+        prev = self.prev_pos.get(spr)
+        if prev is None or self.alpha >= 1.0:
+            return spr.rect
+        x0, y0 = prev
+        return x0 + (spr.rect.x - x0)*self.alpha, y0 + (spr.rect.y - y0)*self.alpha
+
+    def begin(self, full: bool = False, t: float = 0):
+        """
+        フレームの描画を始める（前フレームの描画位置の背景を復元する）
+        full：全画面エフェクトなどで全体を描き直す場合True，t：背景のスクロール位置を決める時刻
+        """
+        if self.bg.revision != self.bg_revision:
+            self.need_full = True
+            self.bg_revision = self.bg.revision
+        self.full = not self.enabled or full or self.need_full or self.bg.moving or len(self.prev) > self.max_rects
+        if self.full:
+            self.bg.draw(self.screen, t)
+            self.need_full = False
+        else:
+            self.bg.restore(self.screen, self.prev)
+        self.rects = []
+
+    def add(self, *rects: pg.Rect):
+        """
+        スプライト以外で描画した矩形を登録する
+        """
+        if self.enabled:
+            self.rects.extend(rects)
+
+    def blits(self, seq):
+        """
+        （画像, 位置）の列をまとめて描画し，描画した矩形を記録する
+        """
+        rects = self.screen.blits(seq, doreturn=self.enabled)
+        if self.enabled:
+            self.rects.extend(rects)
+
+    def draw(self, group: pg.sprite.Group):
+        """
+        グループのスプライトを描画し，描画した矩形を記録する
+        """
+        if self.prev_pos and self.alpha < 1.0:
+            seq = [(spr.image, self.place(spr)) for spr in group]
+        else:
+            seq = [(spr.image, spr.rect) for spr in group]
+        rects = self.screen.blits(seq, doreturn=self.enabled)
+        if self.enabled:
+            self.rects.extend(rects)
+
+    def present(self, hud_rect: pg.Rect | None = None):
+        """
+        描画結果をウィンドウに反映する
+        hud_rect：HUDを描き直した場合，そのウィンドウ上の矩形
+        """
+        if self.full or len(self.prev) + len(self.rects) > self.max_rects:
+            pg.display.update()
+        else:
+            dirty = [r.clip(self.area).move(self.offset) for r in self.prev + self.rects]
+            if hud_rect is not None:
+                dirty.append(hud_rect)
+            pg.display.update(dirty)
+        self.prev = self.rects
 
-    screen.blit(font_mid.render("GAME TITLE", True, (255, 255, 0)), (x, y))
-    screen.blit(font_title.render("Koukaton", True, (255, 100, 50)), (x, y + 30))
 
-    y += 120
+class KeyState:
+    """
+    記録から復元した押下状態を，pg.key.get_pressed()の戻り値と同じように引けるクラス
+    """
+    def __init__(self, held: set[int]):
+        self.held = held
 
-    screen.blit(font_mid.render("SCORE", True, (200, 200, 255)), (x, y))
-    screen.blit(font_big.render(str(score), True, (255, 255, 255)), (x, y+30))
+    def __getitem__(self, key: int) -> bool:
+        return key in self.held
 
-    y += 120
-    
-    screen.blit(font_mid.render("LIFE", True, (255, 200, 200)), (x, y))
-    for i in range(lives):
-        pg.draw.circle(screen, (255, 100, 100), (x+20+i*35, y+50), 12)
 
-    y += 120
-    
-    screen.blit(font_mid.render("SKILL", True, (200, 255, 200)), (x, y))
-    for i in range(skill_count):
-        pg.draw.circle(screen, (100, 255, 100), (x+20+i*35, y+50), 12)
+class InputRecorder:
+    """
+    ロジック1ステップごとのキー入力を記録し，バイナリファイルに保存するクラス
+    形式：ヘッダ（識別子4バイト＋シード8バイト）の後に，1ステップにつき2バイト
+    （押し続けているキーのビット列，そのステップで押されたキーのビット列）
+    """
+    MAGIC = b"KKIN"
+    HEADER = struct.Struct("<4sq")
+    held_keys = [pg.K_UP, pg.K_DOWN, pg.K_LEFT, pg.K_RIGHT, pg.K_SPACE]
+    press_keys = [pg.K_q, pg.K_e, pg.K_RETURN, pg.K_s]
+
+    def __init__(self, path: str, seed: int):
+        self.path = path
+        self.seed = seed
+        self.data = bytearray()
+
+    def record(self, key_lst, events: list[pg.event.Event]):
+        held = 0
+        for i, k in enumerate(__class__.held_keys):
+            if key_lst[k]:
+                held |= 1 << i
+        pressed = 0
+        for event in events:
+            if event.type == pg.KEYDOWN and event.key in __class__.press_keys:
+                pressed |= 1 << __class__.press_keys.index(event.key)
+        self.data += bytes((held, pressed))
 
-    if decorative_img:
-        img_rect = decorative_img.get_rect()
-        # 修正：画像の中央揃え計算をHUD幅基準に変更
-        img_x = (HUD_WIDTH - img_rect.width) // 2
-        img_y = HEIGHT - img_rect.height - 130 
-        screen.blit(decorative_img, (img_x, img_y))
+    def save(self):
+        with open(self.path, "wb") as f:
+            f.write(__class__.HEADER.pack(__class__.MAGIC, self.seed))
+            f.write(self.data)
 
 
-def main():
-    pg.display.set_caption("東工プロジェクト")
-    
-    # 修正：Window全体用の親スクリーンを定義
-    root_screen = pg.display.set_mode((WIDTH, HEIGHT))
-    
-    # 修正：ゲーム画面用スクリーンと右UI画面用スクリーンを定義
-    screen = pg.Surface((GAME_WIDTH, HEIGHT))
-    ui_screen = pg.Surface((HUD_WIDTH, HEIGHT))
-    
-    bg_img = pg.image.load(f"fig/haikei_2.png")
-    score = 0
+class InputPlayer:
+    """
+    InputRecorderで保存した入力を読み込み，ステップごとに再生するクラス
+    """
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, self.seed = InputRecorder.HEADER.unpack_from(data)
+        if magic != InputRecorder.MAGIC:
+            raise ValueError(f"{path} は入力記録ファイルではありません")
+        self.data = data[InputRecorder.HEADER.size:]
+
+    def __len__(self) -> int:
+        return len(self.data) // 2
+
+    def get(self, step: int) -> tuple[KeyState, list[pg.event.Event]]:
+        """
+        stepステップ目の押下状態と，そのステップで押されたキーのイベントを返す
+        """
+        held, pressed = self.data[2*step], self.data[2*step + 1]
+        keys = KeyState({k for i, k in enumerate(InputRecorder.held_keys) if held >> i & 1})
+        events = [pg.event.Event(pg.KEYDOWN, key=k) for i, k in enumerate(InputRecorder.press_keys) if pressed >> i & 1]
+        return keys, events
+
+
+class FrameProfiler:
+    """
+    ゲームループの処理ごと（フェーズごと）の時間を計測するクラス
+    直近windowフレームの平均とp99をHUD上に重ねて表示し，フレームごとの値をCSVに書き出せる
+    """
+    phases = ["assets", "events", "input", "spawn", "ai", "collision", "physics", "effects", "render", "hud", "present"]
+
+    def __init__(self, window: int = 300, csv_path: str | None = None, visible: bool = False):
+        self.history: deque[list[float]] = deque(maxlen=window)
+        self.cur = [0.0] * len(__class__.phases)
+        self.index = {name: i for i, name in enumerate(__class__.phases)}
+        self.t = time.perf_counter()
+        self.frame = 0
+        self.steps = 0  # このフレームで進めたロジックのステップ数
+        self.visible = visible
+        self.ttff_ms = None  # 起動から最初のフレームを表示するまでの時間
+        self.font = None
+        self.lines: list[pg.Surface] = []
+        self.csv_file = None
+        self.writer = None
+        if csv_path:
+            self.csv_file = open(csv_path, "w", newline="")
+            self.writer = csv.writer(self.csv_file)
+            self.writer.writerow(["frame", "steps"] + [f"{name}_ms" for name in __class__.phases] + ["total_ms"])
+
+    def mark(self, phase: str):
+        """
+        前回のmarkからの経過時間をphaseに加算する
+        """
+        now = time.perf_counter()
+        self.cur[self.index[phase]] += now - self.t
+        self.t = now
+
+    def resume(self):
+        """
+        待ち時間（clock.tickなど）を計測対象から外して計測を再開する
+        """
+        self.t = time.perf_counter()
+
+    def end_frame(self):
+        """
+        1フレーム分の計測値を確定して履歴とCSVに追加する
+        """
+        if self.ttff_ms is None:
+            self.ttff_ms = (time.perf_counter() - STARTED_AT) * 1000
+        ms = [v * 1000 for v in self.cur]
+        self.history.append(ms)
+        if self.writer is not None:
+            self.writer.writerow([self.frame, self.steps] + [f"{v:.3f}" for v in ms] + [f"{sum(ms):.3f}"])
+        self.frame += 1
+        self.steps = 0
+        self.cur = [0.0] * len(__class__.phases)
+
+    def stats(self) -> dict[str, tuple[float, float]]:
+        """
+        フェーズごとの（平均，p99）をミリ秒で返す（"total"は1フレーム全体）
+        """
+        if not self.history:
+            return {}
+        cols = np.array(self.history)
+        cols = np.column_stack([cols, cols.sum(axis=1)])
+        avg = cols.mean(axis=0)
+        p99 = np.percentile(cols, 99, axis=0)
+        return {name: (avg[i], p99[i]) for i, name in enumerate(__class__.phases + ["total"])}
+
+    def draw(self, screen: pg.Surface, top: int = 470) -> bool:
+        """
+        表示中ならHUD用スクリーンの下部に計測結果を重ねて描く
+        文字の描き直しは10フレームに1回にとどめる
+        戻り値：描いたかどうか
+        """
+        if not self.visible:
+            return False
+        if self.font is None:
+            self.font = pg.font.Font(None, 22)
+        if self.frame % 10 == 0 or not self.lines:
+            rows = [("phase", "avg ms", "p99 ms")]
+            rows += [(name, f"{avg:.2f}", f"{p99:.2f}") for name, (avg, p99) in self.stats().items()]
+            if self.ttff_ms is not None:
+                rows.append(("1st frame", f"{self.ttff_ms:.0f}", ""))
+            self.lines = [[self.font.render(col, True, (200, 255, 200)) for col in row] for row in rows]
+        pg.draw.rect(screen, (0, 0, 0), (0, top, HUD_WIDTH, HEIGHT - top))
+        for i, (name, avg, p99) in enumerate(self.lines):
+            y = top + 10 + i*20
+            screen.blit(name, (20, y))
+            screen.blit(avg, avg.get_rect(topright=(190, y)))
+            screen.blit(p99, p99.get_rect(topright=(270, y)))
+        return True
+
+    def close(self):
+        if self.csv_file is not None:
+            self.csv_file.close()
+
+
+class FixedTimestep:
+    """
+    ゲームロジックを実時間に対して一定周期（既定50Hz）で進めるための時間管理クラス
+    経過時間をためておき（アキュムレータ），たまった分だけロジックを進める
+    描画が遅れた場合は1回の描画の間に複数ステップ進める（描画フレームを飛ばす）
+    """
+    def __init__(self, hz: int = 50, max_steps: int = 5):
+        self.hz = hz
+        self.dt = 1 / hz
+        self.max_steps = max_steps  # 1回の描画あたりの上限（これを超える遅れは切り捨てる）
+        self.acc = 0.0
+        self.last = time.perf_counter()
+
+    def steps(self) -> int:
+        """
+        前回呼び出しからの経過時間に対して，進めるべきステップ数を返す
+        """
+        now = time.perf_counter()
+        self.acc += now - self.last
+        self.last = now
+        n = int(self.acc / self.dt)
+        if n > self.max_steps:
+            n = self.max_steps
+            self.acc = 0.0
+        else:
+            self.acc -= n * self.dt
+        return n
 
-    bird = Bird(3, (GAME_WIDTH//2, HEIGHT - 100))
-    bombs = pg.sprite.Group()
-    beams = pg.sprite.Group()
-    exps = pg.sprite.Group()
-    emys = pg.sprite.Group()
-    emps = pg.sprite.Group()
+    @property
+    def alpha(self) -> float:
+        """
+        次のステップまでの進み具合（0以上1未満）
+        """
+        return min(self.acc / self.dt, 1.0)
 
-    gravities = pg.sprite.Group()
-    shields = pg.sprite.Group()
-    boss_spawned = False
-    skill_flashes = pg.sprite.Group()
 
-    try:
-        ui_img_original = pg.image.load("fig/3.png") 
-        ui_img = pg.transform.rotozoom(ui_img_original, 0, 3.0)
-    except FileNotFoundError:
-        ui_img = None
-
-    score = 0
-    lives = 3
-    tmr = 0
-    clock = pg.time.Clock()
-    shot_interval = 10
-    boss_spawned = False
-    skill_count = 3
-    attack = None
-
-    while True:
-        key_lst = pg.key.get_pressed()
-        shot_interval = bird.shot_interval
-
-        if key_lst[pg.K_SPACE] and tmr % shot_interval == 0:
-            nb = NeoBeam(bird, 5)
-            dmk = nb.gen_beams()
-            beams.add(dmk)
-
-        for event in pg.event.get():
-            if event.type == pg.QUIT:
-                return 0
-
-            if event.type == pg.KEYDOWN and event.key == pg.K_q:
-                activated, skill_count = bird.skill(skill_count, fps=50)
+class Scheduler:
+    """
+    時刻（tmr）を指定して処理を予約し，その時刻になったら呼び出すクラス
+    予約はヒープで管理するので，run()の処理量は実際に起きるイベントの数にだけ比例する
+    （生きている敵やエフェクトの数には比例しない）
+    """
+    def __init__(self):
+        self.heap: list[list] = []
+        self.seq = itertools.count()  # 同じ時刻の予約は予約した順に呼ぶ
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def at(self, when: int, fn, *args) -> list:
+        """
+        時刻whenにfn(*args)を呼ぶよう予約し，取り消し用の予約を返す
+        """
+        entry = [when, next(self.seq), fn, args]
+        heapq.heappush(self.heap, entry)
+        return entry
+
+    @staticmethod
+    def cancel(entry: list):
+        entry[2] = None  # ヒープからは呼び出し時刻に取り除く
+
+    def run(self, now: int) -> int:
+        """
+        時刻now以前の予約をすべて呼び出す（呼び出し中に追加された時刻now以前の予約も含む）
+        戻り値：呼び出した数
+        """
+        heap = self.heap
+        n = 0
+        while heap and heap[0][0] <= now:
+            _, _, fn, args = heapq.heappop(heap)
+            if fn is not None:
+                fn(*args)
+                n += 1
+        return n
+
+
+class World:
+    """
+    ゲームの状態（各グループ，スコア，残機，スキル回数，tmr）をまとめて持ち，
+    順番に並べたシステムで1ステップ（1/50秒）ずつ進めるクラス
+    systemsの順に各メソッドを呼ぶので，orderを並べ替えたりskipに名前を入れたりして
+    システムごとに入れ替え・停止・計測ができる（描画renderはステップとは別に呼ぶ）
+    敵の発射・スキルやエフェクトの終了は，毎ステップ数え下げる代わりに2つのスケジューラに予約する
+    （attacksはaiで，expiriesはeffectsで，その時刻までの予約を呼び出す）
+    """
+    systems = ["input", "spawn", "ai", "collision", "physics", "effects"]
+    skill_steps = 50 * 5  # スキルの持続ステップ数（5秒）
+
+    def __init__(self, screen: pg.Surface, rng: random.Random):
+        self.screen = screen
+        self.rng = rng
+        self.bird = Bird(3, (GAME_WIDTH//2, HEIGHT - 100))
+        self.bombs = BulletField(rng=rng)
+        self.beams = pg.sprite.Group()
+        self.beam_grid = SpatialHash()
+        self.exps = ExplosionField()
+        self.emys = pg.sprite.Group()
+        self.emps = pg.sprite.Group()
+        self.gravities = pg.sprite.Group()
+        self.shields = pg.sprite.Group()
+        self.skill_flashes = pg.sprite.Group()
+
+        self.score = 0
+        self.lives = 3
+        self.hits = 0  # 被弾した回数（無敵中の被弾も含む）
+        self.skill_count = 3
+        self.tmr = 0
+        self.boss_spawned = False
+        self.attack = None  # 攻撃パターンを選ぶ出目（通常敵とボスで共有）
+        self.enemy_script = ENEMY_SCRIPT
+        self.boss_script = BOSS_SCRIPT
+        self.boss_shots: dict[Pattern, list] = {}  # ボスの各パターンの次の発射の予約
+        self.game_over = False
+        self.attacks = Scheduler()
+        self.expiries = Scheduler()
+
+        self.key_lst = KeyState(set())
+        self.events: list[pg.event.Event] = []
+        self.order = list(__class__.systems)
+        self.skip: set[str] = set()
+
+    def step(self, key_lst, events: list[pg.event.Event], profiler: "FrameProfiler | None" = None):
+        """
+        入力key_lst，eventsでシステムを順に1回ずつ実行し，tmrを1進める
+        profilerを渡すとシステムごとの時間を計測する
+        ゲームオーバーになった場合は，その時点で打ち切る（tmrは進めない）
+        """
+        self.key_lst = key_lst
+        self.events = events
+        for name in self.order:
+            if name not in self.skip:
+                getattr(self, name)()
+            if profiler is not None:
+                profiler.mark(name)
+            if self.game_over:
+                return
+        self.tmr += 1
+        if self.boss_spawned and all(not isinstance(e, BossEnemy) for e in self.emys):
+            self.boss_spawned = False
+
+    def input(self):
+        """
+        ビームの発射と，スキル・EMP・重力場・防御壁のキー操作
+        """
+        bird = self.bird
+        if self.key_lst[pg.K_SPACE] and self.tmr % bird.shot_interval == 0:
+            self.beams.add(NeoBeam(bird, 5).gen_beams())
+
+        for event in self.events:
+            if event.type != pg.KEYDOWN:
+                continue
+            if event.key == pg.K_q:
+                activated, self.skill_count = bird.skill(self.skill_count)
                 if activated:
-                    skill_flashes.add(SkillFlash(life=12, alpha_hi=180, alpha_lo=0))
-
-            if event.type == pg.KEYDOWN and event.key == pg.K_e:
-                if score.value >= 20 and len(emps) == 0:
-                    score.value -= 20
+                    self.expire(__class__.skill_steps, bird.end_skill)
+                    self.skill_flashes.add(SkillFlash(life=12, alpha_hi=180, alpha_lo=0))
+            # 修正：scoreは整数なので.valueは付けない
+            if event.key == pg.K_e:
+                if self.score >= 20 and len(self.emps) == 0:
+                    self.score -= 20
                     life_frames = max(1, int(0.05 * 50))
                     # 修正：screen引数はゲーム画面用のscreenを渡す
-                    emps.add(EMP(emys, bombs, screen, life_frames))
-            if event.type == pg.KEYDOWN and event.key == pg.K_RETURN and score.value >=200:
-                score.value -= 200
-                gravities.add(Gravity(400))
-            if event.type == pg.KEYDOWN and event.key == pg.K_s:
-                if score.value >= 50 and len(shields) == 0:
-                    score.value -= 50
-                    shields.add(shield(bird, 400))
-        
-        # 修正：背景描画などはゲーム画面用screenに対して行う
-        screen.blit(bg_img, [0, 0])
-
-
-        if not boss_spawned and tmr % 100 == 0:
+                    self.add_timed(self.emps, EMP(self.emys, self.bombs, self.screen, life_frames))
+            if event.key == pg.K_RETURN and self.score >= 200:
+                self.score -= 200
+                self.add_timed(self.gravities, Gravity(400))
+            if event.key == pg.K_s:
+                if self.score >= 50 and len(self.shields) == 0:
+                    self.score -= 50
+                    self.add_timed(self.shields, shield(bird, 400))
+
+    def expire(self, steps: int, fn, *args):
+        """
+        今のステップから数えてstepsステップ目の最後（effectsの中）にfn(*args)を呼ぶ
+        """
+        self.expiries.at(self.tmr + steps - 1, fn, *args)
+
+    def add_timed(self, group: pg.sprite.Group, spr: pg.sprite.Sprite):
+        """
+        寿命spr.lifeのスプライトをgroupに加え，寿命が尽きるステップに消す
+        """
+        group.add(spr)
+        self.expire(spr.life, spr.kill)
+
+    def spawn(self):
+        if not self.boss_spawned and self.tmr % 100 == 0:
             # 確認用：ボスが出やすいように調整する場合はここを調整
-            level = tmr // 200 + 1 
+            level = self.tmr // 200 + 1
             if level % 3 == 0:
-                boss = BossEnemy(level)
-                emys = pg.sprite.Group()
-                emys.add(boss)
-                boss_spawned = True
+                # ボスの出現時は通常敵を消してボスだけにする
+                boss = BossEnemy(level, self.rng)
+                self.emys.empty()
+                self.emys.add(boss)
+                self.boss_spawned = True
+                self.schedule_boss(boss)
             else:
-                emys.add(Enemy(level))
-
-        for emy in emys:
-            if emy.state == "stop" and tmr % emy.interval == 0:
-                attack = random.randint(0,100)
-                if attack<=20:
-                    bombs.add(EnemyAttack(emy, bird).kotei(10, 5, 5, 60))
-                elif attack<=60:
-                    bombs.add(EnemyAttack(emy, bird).jiki(10, 5, 5, 60))
-                elif attack==80:
-                    bombs.add(EnemyAttack(emy, bird).kotei(20, 2, 3, 90))
-                else:
-                    bombs.add(EnemyAttack(emy, bird).jiki(10, 10, 1, 0))
-                emy.state = "shoot"
-                emy.ready_to_shoot = False
-            if boss_spawned is True:
-                if tmr % 300 == 0:
-                    attack = random.randint(0,100)
-                if attack is None or tmr % 300 >= 200:
-                    pass 
-                elif attack <= 25:
-                    if tmr % 10 == 0:
-                        bombs.add(EnemyAttack(emy, bird).kotei(20, 5, 1, 0))
-                    if tmr % 50 == 0:
-                        bombs.add(EnemyAttack(emy, bird).jiki(10, 5, 5, 60))
-                elif attack <= 50:
-                    if tmr % 8 == 0:
-                        bombs.add(EnemyAttack(emy, bird).jiki(10, 10, 1, 0))
-                    if tmr % 50 == 0:
-                        bombs.add(EnemyAttack(emy, bird).kotei(10, 5, 3, 30))
-                elif attack <= 75:
-                    if tmr % 50 == 0:
-                        bombs.add(EnemyAttack(emy, bird).kotei(10, 5, 5, 60))
-                        bombs.add(EnemyAttack(emy, bird).kotei(10, 4, 4, 45))
-                    if tmr % 50 == 25:
-                        bombs.add(EnemyAttack(emy, bird).jiki(10, 5, 3, 30))
-                elif attack <= 100:
-                    if tmr % 10 ==0:
-                        bombs.add(EnemyAttack(emy, bird).kotei(10, 5, 20, 360))
-            
-
-        hits = pg.sprite.groupcollide(emys, beams, False, True)
+                self.emys.add(Enemy(level, self.rng))
+
+    def ai(self):
+        """
+        このステップに予約されている敵とボスの発射を行う
+        """
+        self.attacks.run(self.tmr)
+
+    def enemy_fire(self, emy: Enemy):
+        """
+        通常敵が弾幕の台本どおりに撃つ（EMPで無効化された敵や倒された敵は撃たない）
+        """
+        if not emy.alive() or emy.state != "stop" or self.tmr % emy.interval != 0:
+            return
+        self.attack = self.rng.randint(0, 100)
+        self.enemy_script.fire(EnemyAttack(emy, self.bird, self.bombs), self.attack, self.tmr)
+        emy.state = "shoot"
+        emy.ready_to_shoot = False
+
+    def enemy_stopped(self, emy: Enemy):
+        """
+        移動を終えて止まった敵の次の発射を，発射間隔の倍数の時刻に予約する
+        """
+        tmr = self.tmr
+        if tmr % emy.interval == 0:
+            emy.state = "shoot"  # 止まったステップがちょうど発射時刻なら撃たずに次の動きへ
+        elif emy.interval != math.inf:
+            self.attacks.at(tmr + emy.interval - tmr % emy.interval, self.enemy_fire, emy)
+
+    def schedule_boss(self, boss: BossEnemy):
+        """
+        出現したボスの出目の振り直しと，今の出目のパターンの発射を予約する
+        """
+        cycle = self.boss_script.cycle
+        if cycle is None:
+            self.boss_phase(boss)
+            return
+        # 同じ時刻では振り直しを発射より先に呼ぶよう，振り直しから予約する
+        self.attacks.at(self.tmr + (-self.tmr) % cycle, self.boss_reroll, boss)
+        if self.tmr % cycle:
+            self.boss_phase(boss)  # 次の振り直しまでは直前の出目のまま撃つ
+
+    def boss_reroll(self, boss: BossEnemy):
+        if not boss.alive():
+            return
+        self.attacks.at(self.tmr + self.boss_script.cycle, self.boss_reroll, boss)
+        self.attack = self.rng.randint(0, 100)
+        self.boss_phase(boss)
+
+    def boss_phase(self, boss: BossEnemy):
+        """
+        前の出目の発射の予約を取り消し，今の出目の各パターンの発射を予約する
+        """
+        for entry in self.boss_shots.values():
+            Scheduler.cancel(entry)
+        self.boss_shots = {}
+        if self.attack is None:
+            return
+        for pattern in self.boss_script.select(self.attack):
+            self.boss_shots[pattern] = self.attacks.at(self.boss_script.next_time(pattern, self.tmr), self.boss_shoot, boss, pattern)
 
+    def boss_shoot(self, boss: BossEnemy, pattern: Pattern):
+        if not boss.alive():
+            return
+        EnemyAttack(boss, self.bird, self.bombs).shoot(pattern, self.tmr)
+        when = self.boss_script.next_time(pattern, self.tmr + 1)
+        self.boss_shots[pattern] = self.attacks.at(when, self.boss_shoot, boss, pattern)
+
+    def collision(self):
+        """
+        ビームと敵機，敵弾とこうかとん，重力場・防御壁と敵弾の当たり判定
+        """
+        bird, bombs, exps = self.bird, self.bombs, self.exps
+        self.beam_grid.sync(self.beams)
+        hits = self.beam_grid.collide_group(self.emys, True, collide_mask)
         for emy, hit_beams in hits.items():
             for beam in hit_beams:
                 emy.hp -= beam.attack
             if emy.hp <= 0:
-                exps.add(Explosion(emy, 100))
+                exps.add(emy, 100)
                 emy.kill()
-                score += 10
-                bird.change_img(6, screen)
+                self.score += 10
+                bird.change_img(6)
 
-        for bomb in pg.sprite.spritecollide(bird, bombs, True):
+        for center in bombs.kill(bombs.collide_rect(bird.rect)):
+            self.hits += 1
             if getattr(bird, "invincible", False):
-                exps.add(Explosion(bomb, 50))
+                exps.add(center, 50)
                 continue
-            else:
-                lives -= 1
-            if lives == 0:
-                bird.change_img(8, screen)
-                # ゲームオーバー時：現在の画面状態をルートスクリーンに反映させてから止まる
-                root_screen.blit(screen, (0, 0))
-                root_screen.blit(ui_screen, (GAME_WIDTH, 0))
-                pg.display.update()
-                time.sleep(2)
+            self.lives -= 1
+            if self.lives == 0:
+                bird.change_img(8)
+                self.game_over = True
                 return
 
-
-        if len(gravities) > 0:
-            for bomb in bombs:
-                exps.add(Explosion(bomb, 50))
-                bomb.kill()
-                score.value += 1
-            for emy in emys:
-                exps.add(Explosion(emy, 100))
+        if self.gravities:
+            self.score += exps.add_many(bombs.clear(), 50)
+            self.score += 10 * exps.add_many([emy.rect.center for emy in self.emys], 100)
+            for emy in self.emys:
                 emy.kill()
-                score.value += 10
 
-        
-        for bomb in pg.sprite.groupcollide(bombs, shields, True, False).keys():
-            exps.add(Explosion(bomb, 50))
-        
-        # 修正：すべての描画（draw/update）はゲーム画面用screenに対して行う
-        shields.draw(screen)
-        shields.update()
-        bird.update(key_lst, screen)
-        beams.update()
-        beams.draw(screen)
-        emys.update()
-        emys.draw(screen)
-        for emy in emys:
-            emy.draw_hp(screen)
-            if emy.state == "stop" and tmr % emy.interval == 0:
-                emy.state = "shoot"
-        bombs.update()
-        bombs.draw(screen)
-
-        gravities.update()
-        gravities.draw(screen)
-        exps.update()
-        exps.draw(screen)
-        
-        emps.update()
-        emps.draw(screen)
+        for shd in self.shields:
+            exps.add_many(bombs.kill(bombs.collide_rect(shd.rect)), 50)
+
+    def physics(self):
+        """
+        こうかとん・ビーム・敵機・敵弾の移動
+        """
+        self.bird.update(self.key_lst)
+        self.beams.update()
+        for emy in self.emys:
+            moving = emy.state != "stop"
+            emy.update()
+            if moving and emy.state == "stop":
+                self.enemy_stopped(emy)
+        self.bombs.update()
+
+    def effects(self):
+        """
+        爆発とフラッシュのアニメーションを進め，このステップで終わるスキル・エフェクトを終わらせる
+        """
+        self.exps.update()
+        self.skill_flashes.update()
+        self.expiries.run(self.tmr)
+
+    def render(self, renderer: DirtyRenderer):
+        """
+        ゲーム画面を描画する（全画面エフェクト中は差分描画をやめて全体を描き直す）
+        """
+        screen = renderer.screen
+        # 補間中は直前のステップとの間の時刻で背景の位置を決める
+        renderer.begin(full=bool(self.gravities or self.emps or self.skill_flashes), t=self.tmr - 1 + renderer.alpha)
+        renderer.draw(self.shields)
+        renderer.add(screen.blit(self.bird.image, renderer.place(self.bird)))
+        renderer.draw(self.beams)
+        renderer.draw(self.emys)
+        renderer.blits([emy.hp_bar() for emy in self.emys])
+        if renderer.enabled:
+            renderer.add(*self.bombs.draw(screen, True, renderer.alpha))
+            renderer.draw(self.gravities)
+            renderer.add(*self.exps.draw(screen, True))
+        else:
+            self.bombs.draw(screen, alpha=renderer.alpha)
+            renderer.draw(self.gravities)
+            self.exps.draw(screen)
+        renderer.draw(self.emps)
+        renderer.draw(self.skill_flashes)
+
 
-        skill_flashes.update()
-        skill_flashes.draw(screen)
+def main(dirty: bool = False, interpolate: bool = False, fps: int = 50, headless: bool = False, max_frames: int | None = None,
+         seed: int | None = None, record: str | None = None, replay: str | None = None,
+         profile: bool = False, profile_csv: str | None = None, bg: str | None = None):
+    """
+    ゲームのメインループ
+    headless：描画と時間待ちを行わず，ロジックだけを最大速度で進める
+    （ウィンドウを出さないためには，pg.initの前にSDL_VIDEODRIVER=dummyを設定しておく）
+    max_frames：ヘッドレス時に進める最大フレーム数（Noneならゲームオーバーまで）
+    seed：乱数のシード（Noneなら毎回ランダム）
+    record：入力を記録するファイル名，replay：再生する入力記録のファイル名（シードも記録から復元する）
+    profile：処理時間の表示を最初から出す（F3キーで切り替え），profile_csv：フレームごとの処理時間を書き出すCSV
+    bg：背景の種類（BG_LAYERSのキー，Noneならdirtyのときstatic，それ以外はscroll）
+    （動く背景では毎フレーム全体を描き直すので，dirtyと組み合わせても差分更新にならない）
+    """
+    player = InputPlayer(replay) if replay else None
+    if player is not None:
+        seed = player.seed
+    elif seed is None:
+        seed = random.randrange(2**32)
+    rng = random.Random(seed)
+    recorder = InputRecorder(record, seed) if record else None
 
-        # 修正：UI描画関数には右画面用スクリーンを渡す
-        draw_ui(ui_screen, score, lives, skill_count, ui_img)
+    pg.display.set_caption("東工プロジェクト")
+    
+    # 修正：Window全体用の親スクリーンを定義
+    root_screen = pg.display.set_mode((WIDTH, HEIGHT))
+    # 最初のフレームに必要な画像だけを読み込み，残りは別スレッドで読み込む
+    # （ループ内で直接ディスクI/Oを行うのは，読み込み前の画像が必要になった場合のみ）
+    Assets.start_streaming()
+    Overlay.build()
+    # 読み込み後の画像の加工は，1フレームに収まるよう画像ごとに分けて登録する
+    Assets.after_streaming(lambda: BeamAtlas.build(15))
+    Assets.after_streaming(*[lambda num=num: Bird.build_bank([num]) for num in range(10)])
+    Assets.after_streaming(*Enemy.cache_tasks(), *BossEnemy.cache_tasks())
+    
+    # 修正：ゲーム画面用スクリーンと右UI画面用スクリーンを定義
+    # 親スクリーンのサブサーフェスにして，合成のためのコピーをなくす
+    screen = root_screen.subsurface((0, 0, GAME_WIDTH, HEIGHT))
+    ui_screen = root_screen.subsurface((GAME_WIDTH, 0, HUD_WIDTH, HEIGHT))
+    ui_rect = pg.Rect(ui_screen.get_abs_offset(), ui_screen.get_size())
+    
+    if bg is None:
+        bg = "static" if dirty else "scroll"
+    background = Background(BG_LAYERS[bg])
+    renderer = DirtyRenderer(screen, background, enabled=dirty)
+    world = World(screen, rng)
 
-        # 修正：最後にルートスクリーンへ2つの画面を貼り付けて更新
-        root_screen.blit(screen, (0, 0))
-        root_screen.blit(ui_screen, (GAME_WIDTH, 0))
-        pg.display.update()
-        
-        tmr += 1
+    # HUDの装飾画像（3倍拡大）は読み込み完了後に描き込む
+    hud = HUD(None)
+    Assets.after_streaming(lambda: hud.set_decoration(pg.transform.rotozoom(Assets.get("3"), 0, 3.0)))
+
+    clock = pg.time.Clock()
+    last_tmr = -1
+
+    timestep = FixedTimestep(50)
+    profiler = FrameProfiler(csv_path=profile_csv, visible=profile)
+    start = time.perf_counter()
+    events = []
+    # ここから先（最初のフレーム以降）のゲームループ内での同期読み込みはlate_loadsに数える
+    Assets.finish_startup()
+
+    try:
+        while True:
+            Assets.pump()
+            profiler.mark("assets")
+            key_lst = pg.key.get_pressed()
+            # QUITとF3は今回取り出したイベントだけで判定する
+            # （ステップが進まないフレームでは events がたまったままになるため）
+            new_events = pg.event.get()
+            for event in new_events:
+                if event.type == pg.QUIT:
+                    return 0
+                if event.type == pg.KEYDOWN and event.key == pg.K_F3:
+                    profiler.visible = not profiler.visible
+                    hud.dirty = True
+            events += new_events
+            profiler.mark("events")
+
+            # ゲームロジックは描画とは独立に50Hzの固定周期で進める
+            # ヘッドレス時は実時間と無関係に1ループ1ステップ進める
+            for _ in range(1 if headless else timestep.steps()):
+                if player is not None:
+                    if world.tmr >= len(player):
+                        return 0
+                    key_lst, events = player.get(world.tmr)
+                if recorder is not None:
+                    recorder.record(key_lst, events)
+                if interpolate:
+                    renderer.snapshot(world.bird, *world.beams, *world.emys)
+                profiler.steps += 1
+                world.step(key_lst, events, profiler)
+                events = []
+                if world.game_over:
+                    break
+
+            if headless:
+                profiler.end_frame()
+                if world.game_over or (max_frames is not None and world.tmr >= max_frames):
+                    elapsed = time.perf_counter() - start
+                    print(f"headless: {world.tmr} frames in {elapsed:.2f}s ({world.tmr / elapsed:.0f} frames/s, late loads {Assets.late_loads()})")
+                    return None if world.game_over else 0
+                continue
+
+            if world.tmr == last_tmr and not interpolate and not world.game_over:
+                # ロジックが進んでいなければ描き直す必要はない
+                clock.tick(fps)
+                profiler.resume()
+                continue
+            last_tmr = world.tmr
+            renderer.alpha = timestep.alpha if interpolate else 1.0
+
+            # 修正：すべての描画はゲーム画面用screenに対して行う
+            world.render(renderer)
+            profiler.mark("render")
+
+            # 修正：UI描画は右画面用スクリーンに対して，値が変わったときだけ行う
+            hud.update(world.score, world.lives, world.skill_count)
+            hud_drawn = hud.draw(ui_screen)
+            hud_drawn = profiler.draw(ui_screen) or hud_drawn
+            profiler.mark("hud")
+
+            # 修正：両画面とも親スクリーンに直接描いているので，更新するだけでよい
+            renderer.present(ui_rect if hud_drawn else None)
+            profiler.mark("present")
+            if profiler.ttff_ms is None and profile:
+                print(f"time to first frame: {(time.perf_counter() - STARTED_AT) * 1000:.0f} ms")
+            profiler.end_frame()
+
+            if world.game_over:
+                # ゲームオーバー時：現在の画面状態を反映させてから止まる
+                time.sleep(2)
+                return
 
-        if boss_spawned and all(not isinstance(e, BossEnemy) for e in emys):
-            boss_spawned = False
-        clock.tick(50)
+            clock.tick(fps)
+            profiler.resume()
+    finally:
+        if recorder is not None:
+            recorder.save()
+        profiler.close()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dirty", action="store_true", help="変化した領域だけ画面を更新する")
+    parser.add_argument("--fps", type=int, default=50, help="描画の上限フレームレート（ロジックは常に50Hz）")
+    parser.add_argument("--interpolate", action="store_true", help="50Hzを超える描画時にスプライトの位置を補間する")
+    parser.add_argument("--headless", action="store_true", help="ウィンドウを出さずにロジックだけを最大速度で実行する")
+    parser.add_argument("--frames", type=int, default=None, help="ヘッドレス時に実行する最大フレーム数")
+    parser.add_argument("--seed", type=int, default=None, help="乱数のシード")
+    parser.add_argument("--record", default=None, help="入力を記録するファイル名")
+    parser.add_argument("--replay", default=None, help="再生する入力記録のファイル名")
+    parser.add_argument("--profile", action="store_true", help="処理時間の内訳を表示する（F3キーで切り替え）")
+    parser.add_argument("--profile-csv", default=None, help="フレームごとの処理時間を書き出すCSVファイル名")
+    parser.add_argument("--bg", choices=list(BG_LAYERS), default=None,
+                        help="背景（static：固定，scroll：スクロール，parallax：3層，既定は--dirtyのときstatic，それ以外はscroll）")
+    args = parser.parse_args()
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
     pg.init()
-    main()
+    main(dirty=args.dirty, interpolate=args.interpolate, fps=args.fps, headless=args.headless, max_frames=args.frames,
+         seed=args.seed, record=args.record, replay=args.replay, profile=args.profile, profile_csv=args.profile_csv,
+         bg=args.bg)
     pg.quit()
     sys.exit()
\ No newline at end of file